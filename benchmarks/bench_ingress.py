@@ -0,0 +1,152 @@
+"""
+Replays a firehose of synthetic gateway messages through Xyzzy.on_message, and through the checks it used to do first.
+Run from the repository root with `python benchmarks/bench_ingress.py` (dfrotz needs to be in PATH, as xyzzy.py checks for it on import).
+The fake channel's permissions_for is much cheaper than disnake's, which walks roles and overwrites, so the real difference is bigger.
+"""
+
+from collections import Counter
+from types import SimpleNamespace
+
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+import typing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import disnake as discord
+
+from modules.policy import PolicyIndex
+from xyzzy import Xyzzy
+
+BOT_ID = 171288238659600384
+
+
+class FakeBot(Xyzzy):
+    """Just enough of Xyzzy for on_message, without connecting to anything."""
+
+    user = SimpleNamespace(id=BOT_ID)
+
+    def __init__(self):
+        self.prefix = re.compile(rf"^<@!?{BOT_ID}>(.*)")
+        self.mentions = ("<@{}>".format(BOT_ID), "<@!{}>".format(BOT_ID))
+        self.ingress_stats = Counter()
+        # Nobody is blocked, and nothing is written anywhere.
+        self.policy = PolicyIndex(SimpleNamespace(load=lambda: ({}, {})))
+        self.channels = {}
+        self.commands = SimpleNamespace(get_command=lambda name: None)
+
+
+class FakeChannel:
+    id = 1
+
+    def permissions_for(self, member):
+        # Roughly the shape of the work disnake does: go through the member's roles.
+        value = 0
+
+        for role in member.roles:
+            value |= role
+
+        return SimpleNamespace(send_messages=True, value=value)
+
+
+async def legacy_on_message(self, msg):
+    """The checks on_message used to run before looking up a command."""
+    if "prefix" not in dir(self):
+        return
+
+    is_reply_to_me = (
+        msg.reference
+        and isinstance(msg.reference.resolved, discord.Message)
+        and msg.reference.resolved.author.id == self.user.id
+    )
+
+    if (
+        msg.author.bot
+        or msg.author.id == self.user.id
+        or (msg.guild and not msg.channel.permissions_for(msg.guild.me).send_messages)
+        or (not self.prefix.match(msg.content) and not is_reply_to_me)
+    ):
+        return
+
+    clean = (
+        msg.content
+        if is_reply_to_me
+        else typing.cast(re.Match, self.prefix.match(msg.content))[1].strip()
+    )
+
+    if len(clean) == 0:
+        return
+
+    if not self.commands.get_command(clean.split(" ")[0]):
+        return
+
+
+def firehose(count):
+    rng = random.Random(1)
+    guild = SimpleNamespace(
+        id=2, name="guild", me=SimpleNamespace(roles=list(range(20)))
+    )
+    channel = FakeChannel()
+    people = [SimpleNamespace(id=1000 + i, bot=False) for i in range(50)]
+    bots = [SimpleNamespace(id=10, bot=True)]
+    messages = []
+
+    for _ in range(count):
+        roll = rng.random()
+        author = rng.choice(people)
+        content = "just chatting about nothing in particular {}".format(rng.random())
+        reference = None
+
+        if roll < 0.03:
+            author = rng.choice(bots)
+        elif roll < 0.06:
+            # A reply to somebody else.
+            reference = SimpleNamespace(resolved=None)
+        elif roll < 0.07:
+            content = "<@{}> nowplaying".format(BOT_ID)
+
+        messages.append(
+            SimpleNamespace(
+                author=author,
+                content=content,
+                reference=reference,
+                guild=guild,
+                channel=channel,
+            )
+        )
+
+    return messages
+
+
+async def replay(handler, bot, messages):
+    start = time.perf_counter()
+
+    for msg in messages:
+        await handler(bot, msg)
+
+    return time.perf_counter() - start
+
+
+async def main():
+    bot = FakeBot()
+    messages = firehose(100000)
+
+    legacy = await replay(legacy_on_message, bot, messages)
+    new = await replay(Xyzzy.on_message, bot, messages)
+
+    print("{} messages".format(len(messages)))
+    print("legacy: {:8.2f} us/message".format(legacy / len(messages) * 1e6))
+    print(
+        "new:    {:8.2f} us/message ({:.1f}x)".format(
+            new / len(messages) * 1e6, legacy / new
+        )
+    )
+    print("dropped: {}".format(dict(bot.ingress_stats)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
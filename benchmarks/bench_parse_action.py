@@ -0,0 +1,116 @@
+"""
+Compares the table-driven action parser against the if-chain it replaced.
+Run from the repository root with `python benchmarks/bench_parse_action.py`.
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from modules.actions import ActionParser
+
+INPUTS = [
+    "n",
+    "North",
+    "go south",
+    "WALK EAST",
+    "w",
+    "x lamp",
+    "examine the brass lantern",
+    "look",
+    "look under bed",
+    "z",
+    "inv",
+    "take lamp",
+    "open door",
+    "<enter>",
+    "ENTER",
+    "put the sword in the case",
+    "lookout",
+    "say hello to the troll",
+]
+
+
+def legacy_parse_action(action):
+    """The old parse_action, as it was in modules/game_channel.py."""
+    if action.lower() in ("n", "north", "go n", "go north", "walk north", "run north"):
+        return "n"
+    elif action.lower() in (
+        "s",
+        "south",
+        "go s",
+        "go south",
+        "walk south",
+        "run south",
+    ):
+        return "s"
+    elif action.lower() in ("e", "east", "go e", "go east", "walk east", "run east"):
+        return "e"
+    elif action.lower() in ("w", "west", "go w", "go west", "walk west", "run west"):
+        return "w"
+    elif (
+        action.lower() in ("[enter]", "(enter)", "{enter}", "<enter>")
+        or action == "ENTER"
+    ):
+        return "ENTER"
+    elif action.lower() in ("space", "[space]", "(space)", "{space}", "<space>"):
+        return "SPACE"
+    elif re.match(r"^(?:x|examine) +(?:.+)", action.lower()):
+        return "examine " + action.lower().split(" ", 1)[1].strip()
+    elif action.lower() in ("z", "wait"):
+        return "wait"
+    elif action.lower() in ("i", "inventory", "inv"):
+        return "inventory"
+    if re.match(r"l(?:ook)(?: .*)?", action.lower()):
+        return (
+            "look " + action.lower().split(" ", 1)[1].strip()
+            if len(action.lower().split(" ")) > 1
+            else "look"
+        )
+    else:
+        return action.lower()
+
+
+def main():
+    rng = random.Random(1)
+    # A democracy round, where most people type one of a few popular commands.
+    votes = [
+        rng.choice(INPUTS[:8]) if rng.random() < 0.8 else rng.choice(INPUTS)
+        for _ in range(1000)
+    ]
+    # Every input being different, so the cache never helps.
+    unique = ["{} {}".format(rng.choice(INPUTS), i) for i in range(1000)]
+
+    print(
+        "{:<14} {:>12} {:>12} {:>8}".format(
+            "case", "legacy (us)", "new (us)", "speedup"
+        )
+    )
+
+    for name, inputs in (("votes", votes), ("unique", unique)):
+        number = 50
+        legacy = timeit.timeit(
+            lambda: [legacy_parse_action(x) for x in inputs], number=number
+        )
+
+        # A fresh parser for every run, so the cache has to be filled each time.
+        def new():
+            parse = ActionParser().parse
+            return [parse(x) for x in inputs]
+
+        new = timeit.timeit(new, number=number)
+        per = number * len(inputs)
+
+        print(
+            "{:<14} {:>12.2f} {:>12.2f} {:>7.1f}x".format(
+                name, legacy / per * 1e6, new / per * 1e6, legacy / new
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compares the output renderer against the line-by-line concatenation GameChannel.parse_output used to do.
+Run from the repository root with `python benchmarks/bench_render.py`.
+Note that the old loop never split lines longer than a message, so for "long lines" it did less work and produced messages Discord would reject.
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from modules.renderer import render_output
+
+WORDS = "the a small brass lamp lies on the_ground *glowing* ~faintly~ north south door".split()
+
+
+def legacy_render(out, indent=0):
+    """The old parse_output loop, collecting messages instead of sending them."""
+    messages = []
+    msg = ""
+
+    for i, line in enumerate(out.splitlines()):
+        if line.strip() == ".":
+            line = ""
+
+        line = line.replace("*", "\\*").replace("_", "\\_").replace("~", "\\~")
+
+        if len(msg + line[indent:] + "\n") < 2000:
+            msg += line[indent:] + "\n"
+        else:
+            messages.append(msg)
+
+            msg = line[indent:]
+
+    if msg.strip():
+        messages.append(msg.strip())
+
+    return messages
+
+
+def paragraph(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def cases():
+    rng = random.Random(1)
+
+    return {
+        "short turn": "\n".join(paragraph(rng, 8) for _ in range(6)) + "\n\n>",
+        "room description": "\n".join(
+            paragraph(rng, 12) if i % 5 else "." for i in range(200)
+        )
+        + "\n\n>",
+        # dfrotz runs with -w 5000, so whole paragraphs come out as one line.
+        "long lines": "\n".join(paragraph(rng, 700) for _ in range(12)) + "\n\n>",
+    }
+
+
+def main():
+    print(
+        "{:<18} {:>12} {:>12} {:>8}".format(
+            "case", "legacy (us)", "new (us)", "speedup"
+        )
+    )
+
+    for name, text in cases().items():
+        number = 200
+        legacy = timeit.timeit(lambda: legacy_render(text), number=number) / number
+        new = timeit.timeit(lambda: list(render_output(text)), number=number) / number
+
+        print(
+            "{:<18} {:>12.1f} {:>12.1f} {:>7.1f}x".format(
+                name, legacy * 1e6, new * 1e6, legacy / new
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Plays games in many channels at once against fake Discord channels and a stub interpreter.
+It reports how many turns a second get through, and where each turn's time goes, for each number of sessions.
+Run from the repository root with `python benchmarks/bench_sessions.py`. It only needs disnake installed: no bot token, and no dfrotz.
+Each player waits for the game's answer before sending their next command, like people do. So turns/s drops when any part of a turn gets slower.
+"""
+
+from types import SimpleNamespace
+
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+
+from fakes import FakeMember, FakeMessage, FakeTextChannel
+
+from modules import process_helpers
+from modules.command_sys import Context
+from modules.game import Game
+from modules.game_channel import GameChannel
+from modules.outbound import Outbox
+from modules.process_pool import ProcessPool
+from modules.save_watcher import SaveWatcher
+from modules.scheduler import Scheduler
+from modules.turns import PERCENTILES, PHASES, TurnLog, percentile
+
+STUB = os.path.join(HERE, "stub_interpreter.sh")
+COMMANDS = ("look", "n", "take lamp", "x lamp", "open door", "inventory", "s", "wait")
+WORDS = (
+    "you are standing in a small dusty room with a door to the north and a staircase "
+    "leading down into darkness there is a brass lamp here on the floor beside an old "
+    "wooden table covered in papers the wind howls outside and somewhere far below water drips"
+).split()
+TITLES = ("West of House", "Cellar", "Maze of Twisty Passages", "Attic", "Kitchen")
+# How long a player waits on an answer before giving up on that turn.
+TURN_TIMEOUT = 30
+
+
+class BenchChannel(GameChannel):
+    """GameChannel that lets the player know when a turn's output has been sent."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.finished = asyncio.Event()
+        # Keep every turn, not just the last few.
+        self.turns = TurnLog(None)
+
+    def _finish_turns(self, turns):
+        super()._finish_turns(turns)
+
+        if turns:
+            self.finished.set()
+
+
+def game_text(size, chunks, rng):
+    """Room-description-like output of about `size` bytes, split into `chunks` for the stub to print separately."""
+    lines = [rng.choice(TITLES)]
+    length = len(lines[0])
+
+    while length < size:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16)))
+        sentence = sentence.capitalize() + "."
+        lines.append(sentence)
+        length += len(sentence) + 1
+
+    text = "\n".join(lines)[:size]
+    step = -(-len(text) // chunks)
+
+    return "\037".join(text[i : i + step] for i in range(0, len(text), step))
+
+
+def close_bot(bot):
+    bot.scheduler.close()
+
+    if bot.outbox.task:
+        bot.outbox.task.cancel()
+
+
+def make_bot(args):
+    if args.discord_limits:
+        outbox = Outbox()
+    else:
+        outbox = Outbox(channel_rate=(10**6, 1.0), global_rate=(10**9, 1.0))
+
+    return SimpleNamespace(
+        output_timeout=args.output_timeout,
+        output_queue_size=8,
+        output_overflow="merge",
+        input_queue_size=4,
+        batch_separator=".",
+        batch_max=8,
+        collapse_window=0,
+        democracy_round=15,
+        democracy_ties="discard",
+        turn_logs={},
+        pool=ProcessPool(0, 0),
+        saves=SaveWatcher(),
+        outbox=outbox,
+        scheduler=Scheduler(),
+    )
+
+
+async def wait_for(event, condition, timeout=TURN_TIMEOUT):
+    """Waits until `condition()` is true, checking again every time `event` is set."""
+    deadline = time.perf_counter() + timeout
+
+    while not condition():
+        event.clear()
+
+        if condition():
+            break
+
+        await asyncio.wait_for(event.wait(), deadline - time.perf_counter())
+
+
+async def play(session, player, turns):
+    """Plays `turns` commands, returning how many got no answer."""
+    lost = 0
+
+    # Let the intro through first, so it isn't counted as the first turn's output.
+    await wait_for(session.channel.activity, lambda: session.channel.messages)
+
+    for i in range(turns):
+        done = len(session.turns) + 1
+        msg = FakeMessage(session.channel, player, COMMANDS[i % len(COMMANDS)])
+
+        await session.handle_input(msg, msg.content)
+
+        try:
+            await wait_for(session.finished, lambda: len(session.turns) >= done)
+        except asyncio.TimeoutError:
+            lost += 1
+
+    return lost
+
+
+async def bench_sessions(count, args):
+    loop = asyncio.get_running_loop()
+    bot = make_bot(args)
+    game = Game("stub", {"path": "stub.z5"})
+    player = FakeMember()
+    sessions = []
+
+    for i in range(count):
+        channel = FakeTextChannel(name="game-{}".format(i), latency=args.latency)
+        sessions.append(BenchChannel(FakeMessage(channel, player), game, bot))
+
+    start = loop.time()
+    await asyncio.gather(*(x.init_process() for x in sessions))
+    spawned = loop.time() - start
+
+    loops = [loop.create_task(x.game_loop()) for x in sessions]
+
+    start = loop.time()
+    lost = sum(await asyncio.gather(*(play(x, player, args.turns) for x in sessions)))
+    elapsed = loop.time() - start
+
+    for session in sessions:
+        await session.force_quit()
+
+    await asyncio.gather(*loops)
+    close_bot(bot)
+
+    log = TurnLog(None)
+
+    for session in sessions:
+        for turn in session.turns.turns:
+            log.add(turn)
+
+    return spawned, elapsed, log, lost
+
+
+async def bench_context(count, args):
+    """Sends command replies through Context.send from `count` channels at once, returning the time taken and each send's latency."""
+    bot = make_bot(args)
+    player = FakeMember()
+    replies = (
+        "```diff\n+Done.\n```",
+        # Long enough to be split into several messages.
+        "```md\n{}\n```".format(
+            "\n".join("[{}](game {})".format(i, i) for i in range(400))
+        ),
+    )
+    times = []
+
+    async def sender():
+        channel = FakeTextChannel(latency=args.latency)
+        ctx = Context(FakeMessage(channel, player, "help"), bot, "help")
+
+        for i in range(args.sends):
+            start = time.perf_counter()
+            await ctx.send(replies[i % len(replies)])
+            times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(count)))
+    elapsed = time.perf_counter() - start
+
+    close_bot(bot)
+
+    return elapsed, sorted(times)
+
+
+def ms(values):
+    return "/".join("{:.1f}".format(x * 1000) for x in values) if values else "-"
+
+
+def raise_file_limit(sessions):
+    """Each session needs a few file descriptors for its pipes, which goes past the usual soft limit of 1024."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = sessions * 4 + 256
+
+    if soft < wanted:
+        soft = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    if soft < wanted:
+        print(
+            "Only {} file descriptors are allowed, so big runs may fail.".format(soft)
+        )
+
+
+async def main(args):
+    rng = random.Random(1)
+
+    process_helpers.INTERPRETER = STUB
+    os.environ["STUB_TEXT"] = game_text(args.text_size, args.chunks, rng)
+    os.environ["STUB_DELAY"] = str(args.delay)
+    os.environ["STUB_GAP"] = str(args.gap)
+
+    print(
+        "{} turns per session, {} byte answers in {} chunk(s), {}s interpreter delay, {}s Discord latency{}".format(
+            args.turns,
+            args.text_size,
+            args.chunks,
+            args.delay,
+            args.latency,
+            ", with rate limits" if args.discord_limits else "",
+        )
+    )
+    print("Latencies are p{} in ms.\n".format("/p".join(str(x) for x in PERCENTILES)))
+    print(
+        "{:>8} {:>8} {:>9} {:>5}  {}".format(
+            "sessions",
+            "spawn s",
+            "turns/s",
+            "lost",
+            "  ".join(name for name, _, _ in PHASES),
+        )
+    )
+
+    for count in args.sessions:
+        spawned, elapsed, log, lost = await bench_sessions(count, args)
+        summary = log.summary()
+
+        print(
+            "{:>8} {:>8.2f} {:>9.1f} {:>5}  {}".format(
+                count,
+                spawned,
+                len(log) / elapsed,
+                lost,
+                "  ".join(ms(summary[name]) for name, _, _ in PHASES),
+            )
+        )
+
+    print("\n{:>8} {:>9}  {}".format("senders", "sends/s", "Context.send"))
+
+    for count in args.sessions:
+        elapsed, times = await bench_context(count, args)
+
+        print(
+            "{:>8} {:>9.1f}  {}".format(
+                count,
+                len(times) / elapsed,
+                ms([percentile(times, x) for x in PERCENTILES]),
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sessions",
+        type=lambda x: [int(n) for n in x.split(",")],
+        default=[1, 10, 100, 1000],
+        help="comma separated numbers of sessions to run at once (default 1,10,100,1000)",
+    )
+    parser.add_argument("--turns", type=int, default=20, help="commands per session")
+    parser.add_argument(
+        "--sends", type=int, default=20, help="Context.send calls per sender"
+    )
+    parser.add_argument(
+        "--text-size", type=int, default=600, help="bytes the game prints per turn"
+    )
+    parser.add_argument(
+        "--chunks", type=int, default=1, help="pieces the game prints each turn in"
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0,
+        help="seconds the game thinks before answering",
+    )
+    parser.add_argument(
+        "--gap", type=float, default=0, help="seconds between the pieces of an answer"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="seconds each Discord request takes"
+    )
+    parser.add_argument(
+        "--output-timeout",
+        type=float,
+        default=0.5,
+        help="xyzzy's output_timeout option",
+    )
+    parser.add_argument(
+        "--discord-limits",
+        action="store_true",
+        help="pace sends with Discord's real rate limits, instead of letting everything through",
+    )
+    args = parser.parse_args()
+
+    raise_file_limit(max(args.sessions))
+
+    with tempfile.TemporaryDirectory() as work:
+        # GameChannel keeps saves relative to where it's run from.
+        os.chdir(work)
+        asyncio.run(main(args))
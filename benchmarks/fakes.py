@@ -0,0 +1,90 @@
+"""
+In-memory stand-ins for the bits of disnake xyzzy talks to, so game sessions and sending can be benchmarked without Discord.
+Every send, edit and reaction waits `latency` seconds, like a request to Discord would, and then succeeds.
+"""
+
+from datetime import datetime, timezone
+from itertools import count
+from types import SimpleNamespace
+
+import asyncio
+
+_ids = count(1)
+
+
+class FakePermissions:
+    send_messages = True
+    embed_links = True
+    attach_files = True
+    add_reactions = True
+
+
+class FakeMember:
+    def __init__(self, name="player", bot=False):
+        self.id = next(_ids)
+        self.name = name
+        self.display_name = name
+        self.mention = "<@{}>".format(self.id)
+        self.bot = bot
+        self.roles = []
+        self.top_role = SimpleNamespace(colour=0x3B88C3)
+
+
+class FakeGuild:
+    def __init__(self, name="guild"):
+        self.id = next(_ids)
+        self.name = name
+        self.me = FakeMember("xyzzy", bot=True)
+
+
+class FakeMessage:
+    def __init__(self, channel, author, content="", embed=None, file=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embed = embed
+        self.file = file
+        self.reference = None
+        self.reactions = []
+        self.created_at = datetime.now(timezone.utc)
+
+    async def edit(self, *, content=None, embed=None, **kwargs):
+        await asyncio.sleep(self.channel.latency)
+
+        self.content = content
+        self.embed = embed
+        self.channel.edits += 1
+        self.channel.activity.set()
+
+        return self
+
+    async def add_reaction(self, emoji):
+        await asyncio.sleep(self.channel.latency)
+        self.reactions.append(emoji)
+
+
+class FakeTextChannel:
+    """Keeps everything sent to it in `messages`, and sets `activity` whenever something is sent or edited."""
+
+    def __init__(self, guild=None, name="games", latency=0):
+        self.id = next(_ids)
+        self.name = name
+        self.guild = guild or FakeGuild()
+        self.latency = latency
+        self.messages = []
+        self.edits = 0
+        self.activity = asyncio.Event()
+
+    def permissions_for(self, member):
+        return FakePermissions()
+
+    async def send(self, content=None, *, embed=None, file=None, files=None, **kwargs):
+        await asyncio.sleep(self.latency)
+
+        msg = FakeMessage(self, self.guild.me, content, embed, file or files)
+        self.messages.append(msg)
+        self.activity.set()
+
+        return msg
@@ -0,0 +1,57 @@
+#!/bin/sh
+# Stands in for dfrotz in benchmarks. It takes the same arguments and answers every command with canned output.
+# It's plain sh rather than Python so a thousand copies can run at once on a small box.
+#
+# STUB_INTRO   printed when the game starts
+# STUB_TEXT    printed for every command, in chunks split on \037 (ASCII unit separator)
+# STUB_DELAY   seconds to "think" before answering a command
+# STUB_GAP     seconds between chunks, for games that print slowly
+
+set -f
+
+save_dir=.
+turn=0
+
+while [ $# -gt 1 ]; do
+    case "$1" in
+        -R) save_dir=$2; shift ;;
+        -L) turn=$(cat "$2" 2>/dev/null || echo 0); shift ;;
+    esac
+
+    shift
+done
+
+printf '%s\n\n>' "${STUB_INTRO:-Welcome to $1.}"
+
+delay=${STUB_DELAY:-0}
+gap=${STUB_GAP:-0}
+us=$(printf '\037')
+
+while IFS= read -r line; do
+    case "$line" in
+        quit)
+            exit 0
+            ;;
+        save)
+            printf 'Please enter a filename: '
+            IFS= read -r name
+            printf '%s' "$turn" > "$save_dir/${name##*/}"
+            printf 'Ok.\n\n>'
+            ;;
+        *)
+            turn=$((turn + 1))
+            [ "$delay" = 0 ] || sleep "$delay"
+            first=1
+            IFS=$us
+
+            for chunk in ${STUB_TEXT:-You said $line.}; do
+                [ "$first" = 1 ] || [ "$gap" = 0 ] || sleep "$gap"
+                first=0
+                printf '%s' "$chunk"
+            done
+
+            unset IFS
+            printf '\n\n>'
+            ;;
+    esac
+done
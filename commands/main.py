@@ -56,7 +56,7 @@ class Main:
 
     @command(has_site_help=False)
     async def ping(self, ctx):
-        msg = await ctx.send("Pong!")
+        msg = await ctx.send("Pong!", mergeable=False)
 
         await msg.edit(
             content="Pong! `{}ms`".format(
@@ -142,40 +142,12 @@ Alternatively, an up-to-date list can be found here: http://xyzzy.roadcrosser.xy
 
             print("Searching for " + ctx.raw)
 
-            games = {
-                x: y
-                for x, y in self.xyzzy.games.items()
-                if ctx.raw.lower() in x.lower()
-                or [z for z in y.aliases if ctx.raw.lower() in z.lower()]
-            }
-            perfect_match = None
-
-            if games:
-                perfect_match = {
-                    x: y
-                    for x, y in games.items()
-                    if ctx.raw.lower() == x.lower()
-                    or [z for z in y.aliases if ctx.raw.lower() == z.lower()]
-                }
-
-            if not games:
-                return await ctx.send(
-                    '```diff\n-I couldn\'t find any games matching "{}"\n```'.format(
-                        ctx.raw
-                    )
-                )
-            elif len(games) > 1 and not perfect_match:
-                return await ctx.send(
-                    "```accesslog\n"
-                    'I couldn\'t find any games with that name, but I found "{}" in {} other games. Did you mean one of these?\n'
-                    '"{}"\n'
-                    "```".format(ctx.raw, len(games), '"\n"'.join(sorted(games)))
-                )
+            result = self.xyzzy.catalog.search.find(ctx.raw)
 
-            if perfect_match:
-                game = list(perfect_match.items())[0][1]
-            else:
-                game = list(games.items())[0][1]
+            if not result.game:
+                return await ctx.send(result.describe(ctx.raw))
+
+            game = result.game
         else:
             # Attempt to load a game from a possible save file.
             attach = ctx.msg.attachments[0]
@@ -195,17 +167,22 @@ Alternatively, an up-to-date list can be found here: http://xyzzy.roadcrosser.xy
                     else:
                         return await ctx.send("```diff\n-{}\n```".format(str(e)))
 
-                for name, stuff in self.xyzzy.games.items():
-                    comp_res = qzl.compare_quetzal(qzl_headers, stuff.path)
-
-                    if comp_res:
-                        game = stuff
-                        break
+                matches = self.xyzzy.catalog.headers.match(qzl_headers)
 
-                if not comp_res:
+                if not matches:
                     return await ctx.send(
                         "```diff\n-No games matching your save file could be found.\n```"
                     )
+                elif len(matches) > 1:
+                    return await ctx.send(
+                        "```accesslog\n"
+                        "Your save file matches {} games:\n"
+                        '"{}"\n'
+                        "Please start the one you want, upload your save with '@xyzzy uploadsave' and use the RESTORE command.\n"
+                        "```".format(len(matches), '"\n"'.join(sorted(matches)))
+                    )
+
+                game = self.xyzzy.games[matches[0]]
 
                 if not os.path.exists("./saves/{}".format(ctx.msg.channel.id)):
                     os.makedirs("./saves/{}".format(ctx.msg.channel.id))
@@ -215,16 +192,12 @@ Alternatively, an up-to-date list can be found here: http://xyzzy.roadcrosser.xy
                 ) as save:
                     save.write(res)
 
-        if str(ctx.msg.guild.id) in self.xyzzy.server_settings:
-            if (
-                game.name
-                in self.xyzzy.server_settings[str(ctx.msg.guild.id)]["blocked_games"]
-            ):
-                return await ctx.send(
-                    '```diff\n- "{}" has been blocked on this server.\n```'.format(
-                        game.name
-                    )
+        if self.xyzzy.policy.is_game_blocked(ctx.msg.guild.id, game.name):
+            return await ctx.send(
+                '```diff\n- "{}" has been blocked on this server.\n```'.format(
+                    game.name
                 )
+            )
 
         print(
             "Now loading {} for #{} (Server: {})".format(
@@ -232,7 +205,7 @@ Alternatively, an up-to-date list can be found here: http://xyzzy.roadcrosser.xy
             )
         )
 
-        chan = GameChannel(ctx.msg, game)
+        chan = GameChannel(ctx.msg, game, self.xyzzy)
         self.xyzzy.channels[ctx.msg.channel.id] = chan
 
         if ctx.msg.attachments:
@@ -285,7 +258,9 @@ Alternatively, an up-to-date list can be found here: http://xyzzy.roadcrosser.xy
             )
         )
 
-        chan = GameChannel(ctx.msg, Game(ctx.raw, {"path": file_dir, "debug": True}))
+        chan = GameChannel(
+            ctx.msg, Game(ctx.raw, {"path": file_dir, "debug": True}), self.xyzzy
+        )
         self.xyzzy.channels[ctx.msg.channel.id] = chan
 
         await ctx.send('```py\nLoaded "{}"\n```'.format(ctx.raw))
@@ -315,6 +290,27 @@ Alternatively, an up-to-date list can be found here: http://xyzzy.roadcrosser.xy
             chan.output = True
             await ctx.send('```basic\n"Terminal Output" is now ON\n```')
 
+    @command()
+    async def screen(self, ctx):
+        """
+        Toggles "screen" mode, where xyzzy edits its last message with new output from the game instead of sending a new one each turn.
+        A new message is started once the last one is full, or when there's a save to attach.
+        """
+        if ctx.msg.channel.id not in self.xyzzy.channels:
+            return await ctx.send(
+                "```diff\n-Nothing is being played in this channel.\n```"
+            )
+
+        chan = self.xyzzy.channels[ctx.msg.channel.id]
+        chan.screen = not chan.screen
+        chan.screen_msg = None
+
+        await ctx.send(
+            '```basic\n"Screen Mode" is now {}.\n```'.format(
+                "ON" if chan.screen else "OFF"
+            )
+        )
+
     @command(usage="[ indent level ]")
     async def indent(self, ctx):
         """
@@ -464,11 +460,11 @@ Alternatively, an up-to-date list can be found here: http://xyzzy.roadcrosser.xy
             "* Anarchy *default*\n"
             "  Anyone can run any command with no restrictions.\n\n"
             "* Democracy\n"
-            "  Commands are voted on by players. After 15 seconds, the highest voted command is run.\n"
+            "  Commands are voted on by players. After {} seconds, the highest voted command is run.\n"
             "  More info: http://helixpedia.wikia.com/wiki/Democracy\n\n"
             "* Driver\n"
             "  Only one person can control the game at a time, but can transfer ownership at any time.\n"
-            "```"
+            "```".format(round(self.xyzzy.democracy_round))
         )
 
     @command(usage="[ mode ] or list")
@@ -526,13 +522,21 @@ Alternatively, an up-to-date list can be found here: http://xyzzy.roadcrosser.xy
                 "```"
             )
         elif res == InputMode.DEMOCRACY:
+            ties = {
+                "discard": "On ties, the command will be scrapped and no input will be sent.",
+                "random": "On ties, one of the top voted commands will be picked at random.",
+                "first": "On ties, whichever of the top voted commands was voted for first will be input.",
+            }
+
             await ctx.send(
                 "```diff\n"
                 "+Democracy mode is now on.\n"
-                "Players will now vote on commands. After 15 seconds, the top voted command will be input.\n"
-                "On ties, the command will be scrapped and no input will be sent.\n"
+                "Players will now vote on commands. After {} seconds, the top voted command will be input.\n"
+                "{}\n"
                 "More info: http://helixpedia.wikia.com/wiki/Democracy\n"
-                "```"
+                "```".format(
+                    round(self.xyzzy.democracy_round), ties[self.xyzzy.democracy_ties]
+                )
             )
         else:
             await ctx.send(
@@ -1,5 +1,4 @@
 from modules.command_sys import command
-import json
 
 
 class Moderation:
@@ -25,20 +24,14 @@ class Moderation:
         if not ctx.msg.mentions:
             return await ctx.send("```diff\n-Please mention some people to block.\n```")
 
-        if str(ctx.msg.guild.id) not in self.xyzzy.blocked_users:
-            self.xyzzy.blocked_users[str(ctx.msg.guild.id)] = []
-
         for men in ctx.msg.mentions:
-            self.xyzzy.blocked_users[str(ctx.msg.guild.id)].append(str(men.id))
+            self.xyzzy.policy.block_user(ctx.msg.guild.id, men.id)
             await ctx.send(
                 '```diff\n+ "{}" has been restricted from entering commands in this server.\n```'.format(
                     men.display_name
                 )
             )
 
-        with open("./bot-data/blocked_users.json", "w") as blck:
-            json.dump(self.xyzzy.blocked_users, blck)
-
     @command(usage="[ @User Mention#1234s ]")
     async def unblock(self, ctx):
         """
@@ -59,22 +52,14 @@ class Moderation:
                 "```diff\n-Please mention some people to unblock.\n```"
             )
 
-        if str(ctx.msg.guild.id) not in self.xyzzy.blocked_users:
-            self.xyzzy.blocked_users[str(ctx.msg.guild.id)] = []
-            return
-
         for men in ctx.msg.mentions:
-            if str(men.id) in self.xyzzy.blocked_users[str(ctx.msg.guild.id)]:
-                self.xyzzy.blocked_users[str(ctx.msg.guild.id)].remove(str(men.id))
+            if self.xyzzy.policy.unblock_user(ctx.msg.guild.id, men.id):
                 await ctx.send(
                     '```diff\n+ "{}" is now allowed to submit commands.\n```'.format(
                         men.display_name
                     )
                 )
 
-        with open("./bot-data/blocked_users.json", "w") as blck:
-            json.dump(self.xyzzy.blocked_users, blck)
-
     @command(usage="[ Game name ] or list")
     async def blockgame(self, ctx):
         """
@@ -96,79 +81,30 @@ class Moderation:
             )
 
         if ctx.args[0].lower() == "list":
-            if (
-                str(ctx.msg.guild.id) not in self.xyzzy.server_settings
-                or not self.xyzzy.server_settings[str(ctx.msg.guild.id)][
-                    "blocked_games"
-                ]
-            ):
+            games = self.xyzzy.policy.blocked_games(ctx.msg.guild.id)
+
+            if not games:
                 return await ctx.send("```diff\n+No blocked games.\n```")
             else:
-                games = self.xyzzy.server_settings[str(ctx.msg.guild.id)][
-                    "blocked_games"
-                ]
-
                 return await ctx.send(
                     "```asciidoc\n.Blocked Games.\n{}\n```".format(
                         "\n".join("* '{}'".format(x) for x in sorted(games))
                     )
                 )
 
-        games = {
-            x: y
-            for x, y in self.xyzzy.games.items()
-            if ctx.raw.lower() in x.lower()
-            or [z for z in y.aliases if ctx.raw.lower() in z.lower()]
-        }
-        perfect_match = None
+        result = self.xyzzy.catalog.search.find(ctx.raw)
+
+        if not result.game:
+            return await ctx.send(result.describe(ctx.raw))
 
-        if games:
-            perfect_match = {
-                x: y
-                for x, y in games.items()
-                if ctx.raw.lower() == x.lower()
-                or [z for z in y.aliases if ctx.raw.lower() == z.lower()]
-            }
+        game = result.game.name
 
-        if not games:
+        if not self.xyzzy.policy.block_game(ctx.msg.guild.id, game):
             return await ctx.send(
-                '```diff\n-I couldn\'t find any games matching "{}"\n```'.format(
-                    ctx.raw
+                '```diff\n- "{}" has already been blocked on this server.\n```'.format(
+                    game
                 )
             )
-        elif len(games) > 1 and not perfect_match:
-            return await ctx.send(
-                "```accesslog\n"
-                'I couldn\'t find any games with that name, but I found "{}" in {} other games. Did you mean one of these?\n'
-                '"{}"\n'
-                "```".format(ctx.raw, len(games), '"\n"'.join(sorted(games)))
-            )
-
-        if perfect_match:
-            game = list(perfect_match.items())[0][0]
-        else:
-            game = list(games[0].items())[0][0]
-
-        if str(ctx.msg.guild.id) not in self.xyzzy.server_settings:
-            self.xyzzy.server_settings[str(ctx.msg.guild.id)] = {
-                "blocked_games": [game]
-            }
-        else:
-            if (
-                game
-                not in self.xyzzy.server_settings[str(ctx.msg.guild.id)][
-                    "blocked_games"
-                ]
-            ):
-                self.xyzzy.server_settings[str(ctx.msg.guild.id)][
-                    "blocked_games"
-                ].append(game)
-            else:
-                return await ctx.send(
-                    '```diff\n- "{}" has already been blocked on this server.\n```'.format(
-                        game
-                    )
-                )
 
         await ctx.send(
             '```diff\n+ "{}" has been blocked and will no longer be able to be played on this server.\n```'.format(
@@ -176,9 +112,6 @@ class Moderation:
             )
         )
 
-        with open("./bot-data/server_settings.json", "w") as srv:
-            json.dump(self.xyzzy.server_settings, srv)
-
     @command(usage="[ Game name ]")
     async def unblockgame(self, ctx):
         """
@@ -196,54 +129,19 @@ class Moderation:
         if not ctx.args:
             return await ctx.send("```diff\n-Please specify a game to unblock.\n```")
 
-        games = {
-            x: y
-            for x, y in self.xyzzy.games.items()
-            if ctx.raw.lower() in x.lower()
-            or [z for z in y.aliases if ctx.raw.lower() in z.lower()]
-        }
-        perfect_match = None
+        result = self.xyzzy.catalog.search.find(ctx.raw)
 
-        if games:
-            perfect_match = {
-                x: y
-                for x, y in games.items()
-                if ctx.raw.lower() == x.lower()
-                or [z for z in y.aliases if ctx.raw.lower() == z.lower()]
-            }
+        if not result.game:
+            return await ctx.send(result.describe(ctx.raw))
 
-        if not games:
-            return await ctx.send(
-                '```diff\n-I couldn\'t find any games matching "{}"\n```'.format(
-                    ctx.raw
-                )
-            )
-        elif len(games) > 1 and not perfect_match:
-            return await ctx.send(
-                "```accesslog\n"
-                'I couldn\'t find any games with that name, but I found "{}" in {} other games. Did you mean one of these?\n'
-                '"{}"\n'
-                "```".format(ctx.raw, len(games), "\n".join(sorted(games)))
-            )
-
-        if perfect_match:
-            game = list(perfect_match.items())[0][0]
-        else:
-            game = list(games[0].items())[0][0]
+        game = result.game.name
 
-        if str(ctx.msg.guild.id) not in self.xyzzy.server_settings:
-            self.xyzzy.server_settings[str(ctx.msg.guild.id)] = {
-                "blocked_games": [game]
-            }
+        if not self.xyzzy.policy.blocked_games(ctx.msg.guild.id):
             return await ctx.send(
                 "```diff\n-No games have been blocked on this server.\n```"
             )
 
-        if game in self.xyzzy.server_settings[str(ctx.msg.guild.id)]["blocked_games"]:
-            self.xyzzy.server_settings[str(ctx.msg.guild.id)]["blocked_games"].remove(
-                game
-            )
-        else:
+        if not self.xyzzy.policy.unblock_game(ctx.msg.guild.id, game):
             return await ctx.send(
                 '```diff\n- "{}" has not been blocked on this server.\n```'.format(game)
             )
@@ -254,9 +152,6 @@ class Moderation:
             )
         )
 
-        with open("./bot-data/server_settings.json", "w") as srv:
-            json.dump(self.xyzzy.server_settings, srv)
-
 
 def setup(xyzzy):
     return Moderation(xyzzy)
@@ -1,4 +1,5 @@
 from modules.command_sys import command
+from modules.outbound import Priority
 from subprocess import PIPE
 
 import traceback as tb
@@ -88,14 +89,20 @@ class Owner:
         if not ctx.args:
             return await ctx.send("```diff\n-Nothing to announce.\n```")
 
-        count = 0
-        with ctx.msg.channel.typing():
-            for chan in self.xyzzy.channels.values():
-                try:
-                    await chan.channel.send("```{}```".format(ctx.raw))
-                    count += 1
-                except:
-                    pass
+        async with ctx.msg.channel.typing():
+            results = await asyncio.gather(
+                *(
+                    self.xyzzy.outbox.send(
+                        chan.channel,
+                        "```{}```".format(ctx.raw),
+                        priority=Priority.ANNOUNCE,
+                    )
+                    for chan in self.xyzzy.channels.values()
+                ),
+                return_exceptions=True,
+            )
+
+        count = sum(1 for x in results if not isinstance(x, Exception))
 
         return await ctx.send(
             f"```diff\n+ Announcement as been sent to {count} channels. (Failed in {len(self.xyzzy.channels) - count})\n```"
@@ -128,6 +135,27 @@ class Owner:
             '```diff\n+Reloaded module "{}".\n```'.format(ctx.args[0].lower())
         )
 
+    @command(owner=True, has_site_help=False)
+    async def reloadgames(self, ctx):
+        """
+        Reloads games.json without restarting. Games currently being played are not affected.
+        [This command may only be used by trusted individuals.]
+        """
+        try:
+            async with ctx.typing():
+                catalog = await self.xyzzy.reload_games()
+        except Exception as e:
+            return await ctx.send("```diff\n-Unable to reload games: {}\n```".format(e))
+
+        await ctx.send(
+            "```diff\n+Reloaded {} games. ({} added, {} removed, {} changed)\n```".format(
+                len(catalog.games),
+                len(catalog.added),
+                len(catalog.removed),
+                len(catalog.changed),
+            )
+        )
+
     @command(owner=True)
     async def nowplaying(self, ctx):
         """
@@ -142,10 +170,66 @@ class Owner:
         msg = "```md\n## Currently playing games: ##\n"
 
         for chan in self.xyzzy.channels.values():
-            msg += "[{0.channel.guild.name}]({0.channel.name}) {0.game.name} {{{1} minutes ago}}\n".format(
-                chan, (ctx.msg.created_at - chan.last).total_seconds() // 60
+            msg += "[{0.channel.guild.name}]({0.channel.name}) {0.game.name}{2} {{{1} minutes ago}} <queue {3}/{0.outputs.maxsize}, {0.outputs.blocked:.1f}s blocked>\n".format(
+                chan,
+                (ctx.msg.created_at - chan.last).total_seconds() // 60,
+                " <hibernated>" if chan.hibernated else "",
+                len(chan.outputs),
+            )
+
+        msg += "```"
+
+        await ctx.send(msg, dest="author")
+
+    @command(owner=True, has_site_help=False)
+    async def pool(self, ctx):
+        """
+        Shows how well the idle game process pool is doing.
+        [This command may only be used by trusted individuals.]
+        """
+        pool = self.xyzzy.pool
+        total = pool.hits + pool.misses
+        msg = "```md\n## Process pool ##\n{} hits, {} misses ({:.0%} hit rate)\n{} idle processes\n".format(
+            pool.hits, pool.misses, pool.hits / total if total else 0, len(pool)
+        )
+
+        for path, idle in sorted(pool.idle.items()):
+            msg += "[{}]({})\n".format(len(idle), path)
+
+        msg += "```"
+
+        await ctx.send(msg)
+
+    @command(owner=True, has_site_help=False)
+    async def latency(self, ctx):
+        """
+        Sends you a direct message breaking down how long recent turns took, per game and per channel.
+        [This command may only be used by trusted individuals.]
+        """
+        if not self.xyzzy.turn_logs:
+            return await ctx.send(
+                "```md\n## No turns have been played yet. ##\n```", dest="author"
             )
 
+        msg = (
+            "```md\n## Turn latency (p50/p90/p99 in ms) ##\n"
+            "<queued: waiting to be written, game: until the game answered, reader: until its output was complete, discord: until it was sent>\n"
+            "# Games\n"
+        )
+
+        for name, log in sorted(self.xyzzy.turn_logs.items()):
+            msg += "[{}]({} turns) {}\n".format(name, len(log), log.format())
+
+        channels = [x for x in self.xyzzy.channels.values() if x.turns]
+
+        if channels:
+            msg += "# Channels\n"
+
+            for chan in channels:
+                msg += "[{0.channel.guild.name}]({0.channel.name}) {0.game.name} <{1} turns> {2}\n".format(
+                    chan, len(chan.turns), chan.turns.format()
+                )
+
         msg += "```"
 
         await ctx.send(msg, dest="author")
@@ -0,0 +1,77 @@
+"""
+Normalises player input into actions, so that different ways of typing the same thing can be grouped together (mainly for democracy votes).
+Input is lowercased once, and looked up in a single table of synonyms before falling back to a couple of precompiled patterns.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+import re
+
+# Canonical action -> every way of typing it.
+ACTIONS = {
+    "n": ("n", "north", "go n", "go north", "walk north", "run north"),
+    "s": ("s", "south", "go s", "go south", "walk south", "run south"),
+    "e": ("e", "east", "go e", "go east", "walk east", "run east"),
+    "w": ("w", "west", "go w", "go west", "walk west", "run west"),
+    "ENTER": ("[enter]", "(enter)", "{enter}", "<enter>"),
+    "SPACE": ("space", "[space]", "(space)", "{space}", "<space>"),
+    "wait": ("z", "wait"),
+    "inventory": ("i", "inventory", "inv"),
+}
+
+EXAMINE_REGEX = re.compile(r"(?:x|examine) +(.+)")
+LOOK_REGEX = re.compile(r"l(?:ook)?(?: +(.*))?")
+
+CACHE_SIZE = 1024
+
+
+def build_synonyms(actions: Dict[str, Iterable[str]]) -> Dict[str, str]:
+    """Flips a table of actions into a lookup from each way of typing them to the action."""
+    return {form.lower(): action for action, forms in actions.items() for form in forms}
+
+
+class ActionParser:
+    """
+    Parses actions using the default table, plus any `synonyms` given for a specific game.
+    `synonyms` takes the same form as `ACTIONS`, and overrides it where they overlap.
+    """
+
+    def __init__(self, synonyms: Optional[Dict[str, Iterable[str]]] = None):
+        self.synonyms = build_synonyms(ACTIONS)
+
+        if synonyms:
+            self.synonyms.update(build_synonyms(synonyms))
+
+        # Crowded channels send the same few commands over and over.
+        self.parse = lru_cache(maxsize=CACHE_SIZE)(self._parse)
+
+    def _parse(self, action: str) -> str:
+        if action == "ENTER":
+            return "ENTER"
+
+        action = action.lower()
+        found = self.synonyms.get(action)
+
+        if found is not None:
+            return found
+
+        match = EXAMINE_REGEX.fullmatch(action)
+
+        if match:
+            return "examine " + match.group(1).strip()
+
+        match = LOOK_REGEX.fullmatch(action)
+
+        if match:
+            return "look " + match.group(1).strip() if match.group(1) else "look"
+
+        return action
+
+
+DEFAULT_PARSER = ActionParser()
+
+
+def parse_action(action: str) -> str:
+    """Parses an action string to easily clump similar actions"""
+    return DEFAULT_PARSER.parse(action)
@@ -0,0 +1,170 @@
+"""
+Loads the game catalog from games.json.
+Everything worked out about each game is cached in bot-data, so a boot with an unchanged catalog only needs to stat the story files.
+"""
+
+from modules.game import Game
+from modules.search import GameSearch
+from time import perf_counter
+
+import hashlib
+import json
+import os
+import modules.quetzal_parser as qzl
+
+CACHE_VERSION = 1
+
+
+class Catalog:
+    """Every playable game, along with the indexes used to find them."""
+
+    def __init__(self, digest=None):
+        self.digest = digest
+        self.games = {}
+        self.headers = qzl.HeaderIndex()
+        self.aliases = {}
+        self.search = None
+        self.entries = {}
+        # What changed compared to the catalog this one replaced.
+        self.added = []
+        self.removed = []
+        self.changed = []
+
+    def add(self, game: Game, entry: dict) -> None:
+        self.games[game.name] = game
+        self.entries[game.name] = entry
+
+        if game.header:
+            self.headers.add(game.name, game.header)
+
+        for key in game.keys:
+            names = self.aliases.setdefault(key, [])
+
+            if game.name not in names:
+                names.append(game.name)
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+
+    return cache
+
+
+def _write_cache(cache_path, cache):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+    with open(cache_path + ".tmp", "w") as f:
+        json.dump(cache, f)
+
+    os.replace(cache_path + ".tmp", cache_path)
+
+
+def load_catalog(
+    path="./games.json",
+    cache_path="./bot-data/catalog_cache.json",
+    previous: Catalog = None,
+) -> Catalog:
+    """
+    Loads the games from `path`, only re-reading story files that have changed since the last boot.
+    If the `previous` catalog is given, games with unchanged entries are carried over without checking their files again.
+    """
+    start = perf_counter()
+
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    digest = hashlib.sha256(raw).hexdigest()
+    cached = _read_cache(cache_path)
+    cached_games = cached.get("games", {})
+    catalog = Catalog(digest)
+    reread = 0
+
+    for name, data in json.loads(raw).items():
+        if (
+            previous
+            and name in previous.games
+            and previous.entries[name]["data"] == data
+        ):
+            catalog.add(previous.games[name], previous.entries[name])
+            continue
+
+        try:
+            stat = os.stat(data["path"])
+        except OSError:
+            print("Path for {} is invalid. Delisting.".format(name))
+            continue
+
+        game = Game(name, data)
+        entry = cached_games.get(name)
+
+        if (
+            entry
+            and entry["data"]["path"] == data["path"]
+            and entry["size"] == stat.st_size
+            and entry["mtime"] == stat.st_mtime_ns
+        ):
+            game.header = qzl.HeaderData(*entry["header"]) if entry["header"] else None
+        else:
+            reread += 1
+
+            try:
+                game.header = qzl.parse_zcode(game.path)
+            except Exception as e:
+                print("Unable to read the header for {}: {}".format(name, e))
+
+        if previous:
+            if name in previous.games:
+                catalog.changed.append(name)
+            else:
+                catalog.added.append(name)
+
+        catalog.add(
+            game,
+            {
+                "data": data,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "header": (
+                    [
+                        game.header.release,
+                        game.header.serial,
+                        game.header.checksum,
+                    ]
+                    if game.header
+                    else None
+                ),
+            },
+        )
+
+    if previous:
+        catalog.removed = [x for x in previous.games if x not in catalog.games]
+
+    if (
+        reread
+        or catalog.entries.keys() != cached_games.keys()
+        or cached.get("digest") != digest
+    ):
+        _write_cache(
+            cache_path,
+            {"version": CACHE_VERSION, "digest": digest, "games": catalog.entries},
+        )
+
+    catalog.search = GameSearch(catalog.games, catalog.aliases)
+
+    print(
+        "Loaded {} games in {:.1f}ms ({}, {} story files read).".format(
+            len(catalog.games),
+            (perf_counter() - start) * 1000,
+            "cold" if reread else "warm",
+            reread,
+        )
+    )
+
+    return catalog
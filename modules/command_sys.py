@@ -4,6 +4,8 @@ Totally not "stolen" from Amethyst and stripped down.
 
 from typing import Callable, List, Union, Tuple
 from random import randint
+from functools import cached_property
+from modules.metrics import REGISTRY
 import disnake as discord
 import inspect
 import re
@@ -16,6 +18,10 @@ if typing.TYPE_CHECKING:
     from xyzzy import Xyzzy
 
 
+COMMANDS_RUN = REGISTRY.counter(
+    "xyzzy_commands_total", "Commands dispatched, by name.", ["command"]
+)
+
 PERMS = [
     x
     for x in dir(discord.Permissions)
@@ -25,53 +31,77 @@ PERMS = [
 ]
 
 
+class ArgumentParseError(ValueError):
+    """Raised when a command's arguments can't be split up, like when a quote isn't closed."""
+
+    def __init__(self, cmd: str, raw: str, reason: str):
+        self.cmd = cmd
+        self.raw = raw
+        self.reason = reason
+
+        super().__init__(
+            'Couldn\'t understand the arguments for "{}": {}.'.format(
+                cmd, reason.lower()
+            )
+        )
+
+
 class Context:
     """
     Custom object that gets passed to commands.
     Not intended to be created manually.
+    Arguments are only split up the first time a command asks for them.
     """
 
     msg: discord.Message
     client: "Xyzzy"
     clean: str
+    is_reply: bool
     cmd: str
-    args: typing.List[str]
     raw: str
 
-    def __init__(self, msg: discord.Message, xyzzy: "Xyzzy"):
-        is_reply_to_me = (
-            msg.reference
-            and isinstance(msg.reference.resolved, discord.Message)
-            and msg.reference.resolved.author.id == xyzzy.user.id
-        )
-
+    def __init__(
+        self, msg: discord.Message, xyzzy: "Xyzzy", clean: str, is_reply: bool = False
+    ):
+        # `clean` and `is_reply` come from Xyzzy.ingress, which has already worked them
+        # out.
         self.msg = msg
         self.client = xyzzy
+        self.clean = clean
+        self.is_reply = is_reply
+        self.cmd, _, self.raw = clean.partition(" ")
 
-        self.clean = (
-            msg.content
-            if is_reply_to_me
-            else typing.cast(re.Match, xyzzy.prefix.match(msg.content))[1].strip()
-        )
+    @cached_property
+    def args(self) -> typing.List[str]:
+        try:
+            # Shlex doesn't obey escaped quotes, so lets do it ourselves.
+            args = shlex.split(self.raw.replace(r"\"", "\u009E").replace("'", "\u009F"))
+        except ValueError as e:
+            raise ArgumentParseError(self.cmd, self.raw, str(e)) from e
 
-        self.cmd = self.clean.split(" ")[0]
-        self.args = shlex.split(
-            self.clean.replace(r"\"", "\u009E").replace("'", "\u009F")
-        )  # Shlex doesn't obey escaped quotes, so lets do it ourselves.
-        self.args = [
-            x.replace("\u009E", '"').replace("\u009F", "'") for x in self.args
-        ][1:]
-        self.raw = self.clean.split(" ", 1)[1] if len(self.clean.split(" ")) > 1 else ""
+        return [x.replace("\u009E", '"').replace("\u009F", "'") for x in args]
 
-    async def _send(self, content, dest, *, embed=None, file=None, files=None):
+    async def _send(
+        self, content, dest, *, embed=None, file=None, files=None, mergeable=True
+    ):
         """Internal send function, not actually meant to be used by anyone."""
         if dest == "channel":
-            return await self.msg.channel.send(
-                content, embed=embed, file=file, files=files
+            return await self.client.outbox.send(
+                self.msg.channel,
+                content,
+                embed=embed,
+                file=file,
+                files=files,
+                mergeable=mergeable,
             )
         elif dest == "author":
-            return await self.msg.author.send(
-                content, embed=embed, file=file, files=files
+            return await self.client.outbox.send(
+                self.msg.author,
+                content,
+                embed=embed,
+                file=file,
+                files=files,
+                mergeable=mergeable,
             )
         else:
             raise ValueError("Destination is not `channel` or `author`.")
@@ -84,8 +114,12 @@ class Context:
         embed: discord.Embed = None,
         file: discord.File = None,
         files: List[discord.File] = None,
+        mergeable: bool = True,
     ):
-        """Sends a message to the context origin, can either be the channel or author."""
+        """
+        Sends a message to the context origin, can either be the channel or author.
+        Pass `mergeable=False` if the message that is returned is going to be edited, so it can't be shared with other messages.
+        """
         if content is None and not embed and not file and not files:
             content = "```ERROR at memory location {}\n  No content.\n```".format(
                 hex(randint(2**4, 2**32))
@@ -108,7 +142,7 @@ class Context:
                 await self._send(
                     content[:2000], dest, embed=embed, file=file, files=files
                 )
-                msg = await self.send(content[2000:], dest=dest)
+                msg = await self.send(content[2000:], dest=dest, mergeable=mergeable)
             elif content.find("```", content.find("```") + 3) + 2 < 2000:
                 await self._send(
                     content[: content.find("```", content.find("```") + 3) + 3],
@@ -120,6 +154,7 @@ class Context:
                 msg = await self.send(
                     content[content.find("```", content.find("```") + 3) + 3 :],
                     dest=dest,
+                    mergeable=mergeable,
                 )
             else:
                 start_block = content[
@@ -141,10 +176,17 @@ class Context:
                     content = start_block + content[len(split_cont) - 4 :]
 
                 msg = await self.send(
-                    split_cont + content, dest=dest, embed=embed, file=file, files=files
+                    split_cont + content,
+                    dest=dest,
+                    embed=embed,
+                    file=file,
+                    files=files,
+                    mergeable=mergeable,
                 )
         else:
-            msg = await self._send(content, dest, embed=embed, file=file, files=files)
+            msg = await self._send(
+                content, dest, embed=embed, file=file, files=files, mergeable=mergeable
+            )
 
         return msg
 
@@ -305,9 +347,7 @@ class Holder:
         return (
             self.aliases[cmd_name]
             if cmd_name in self.aliases
-            else self.commands[cmd_name]
-            if cmd_name in self.commands
-            else None
+            else self.commands[cmd_name] if cmd_name in self.commands else None
         )
 
     async def run(self, ctx: Context) -> None:
@@ -316,6 +356,7 @@ class Holder:
         if not cmd:
             return
 
+        COMMANDS_RUN.inc(command=cmd.name)
         await cmd.run(ctx)
 
     @property
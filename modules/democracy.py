@@ -0,0 +1,81 @@
+"""
+Vote counting for democracy mode.
+Votes are kept as a map of voter to choice alongside a running count, with the leading choices updated as each vote comes in, so nothing needs re-counting or sorting when a round ends.
+"""
+
+from collections import Counter
+from heapq import nsmallest
+
+import random
+
+TIE_POLICIES = ("discard", "random", "first")
+
+# How many choices are shown in the tally message.
+TALLY_LIMIT = 10
+
+
+class VoteEngine:
+    """
+    Holds the votes for one round at a time.
+    `ties` decides what happens when several choices share the most votes:
+    "discard" picks nothing, "random" picks one at random, and "first" picks whichever was voted for first.
+    """
+
+    def __init__(self, ties="discard"):
+        if ties not in TIE_POLICIES:
+            raise ValueError("Unknown tie policy: {}".format(ties))
+
+        self.ties = ties
+        self.reset()
+
+    def __len__(self):
+        return len(self.choices)
+
+    def reset(self):
+        self.choices = {}
+        self.counts = Counter()
+        self.order = {}
+        self.leaders = set()
+        self.top = 0
+
+    def vote(self, voter, choice):
+        """Records a vote, returning False if `voter` already voted this round."""
+        if voter in self.choices:
+            return False
+
+        self.choices[voter] = choice
+        self.counts[choice] += 1
+        self.order.setdefault(choice, len(self.order))
+
+        count = self.counts[choice]
+
+        if count > self.top:
+            self.top = count
+            self.leaders = {choice}
+        elif count == self.top:
+            self.leaders.add(choice)
+
+        return True
+
+    def tied(self):
+        """Gets the leading choices if there is a tie, in the order they were first voted for."""
+        return sorted(self.leaders, key=self.order.get) if len(self.leaders) > 1 else []
+
+    def winner(self):
+        """Gets the winning choice, or None if there were no votes or a tie was discarded."""
+        if not self.leaders:
+            return None
+        elif len(self.leaders) == 1:
+            return next(iter(self.leaders))
+        elif self.ties == "random":
+            return random.choice(self.tied())
+        elif self.ties == "first":
+            return self.tied()[0]
+
+        return None
+
+    def tally(self, limit=TALLY_LIMIT):
+        """Gets the most voted for choices as a list of (choice, votes), most votes first."""
+        return nsmallest(
+            limit, self.counts.items(), key=lambda x: (-x[1], self.order[x[0]])
+        )
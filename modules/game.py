@@ -1,3 +1,6 @@
+from modules.actions import DEFAULT_PARSER, ActionParser
+
+
 class Game:
     def __init__(self, name, data):
         self.name = name
@@ -6,3 +9,9 @@ class Game:
         self.aliases = data.get("aliases", [])
         self.author = data.get("author")
         self.debug = data.get("debug", False)
+        self.header = None
+        self.synonyms = data.get("synonyms", {})
+        # Games without their own synonyms share the default parser, and its cache.
+        self.actions = ActionParser(self.synonyms) if self.synonyms else DEFAULT_PARSER
+        # Lowercased name and aliases, for looking the game up.
+        self.keys = [x.lower() for x in [name] + self.aliases]
@@ -1,54 +1,37 @@
-from subprocess import PIPE
 from enum import Enum
-from modules.process_helpers import handle_process_output
+from io import BytesIO
+from math import ceil
+from modules.process_helpers import handle_process_output, spawn_interpreter
+from modules.democracy import VoteEngine
+from modules.input_queue import DROPPED, MERGED, InputQueue
+from modules.metrics import REGISTRY
+from modules.outbound import EMBED_LIMIT, Priority
+from modules.output_queue import OutputQueue
+from modules.renderer import MESSAGE_LIMIT, render_output
+from modules.save_watcher import HIBERNATE_SAVE
+from modules.turns import Turn, TurnLog
 
-import re
 import shutil
 import os
 import asyncio
 import disnake as discord
 
-SCRIPT_OR_RECORD = re.compile(r"(?i).*(?:\.rec|\.scr)$")
-
-
-def parse_action(action):
-    """Parses an action string to easily clump similar actions"""
-    if action.lower() in ("n", "north", "go n", "go north", "walk north", "run north"):
-        return "n"
-    elif action.lower() in (
-        "s",
-        "south",
-        "go s",
-        "go south",
-        "walk south",
-        "run south",
-    ):
-        return "s"
-    elif action.lower() in ("e", "east", "go e", "go east", "walk east", "run east"):
-        return "e"
-    elif action.lower() in ("w", "west", "go w", "go west", "walk west", "run west"):
-        return "w"
-    elif (
-        action.lower() in ("[enter]", "(enter)", "{enter}", "<enter>")
-        or action == "ENTER"
-    ):
-        return "ENTER"
-    elif action.lower() in ("space", "[space]", "(space)", "{space}", "<space>"):
-        return "SPACE"
-    elif re.match(r"^(?:x|examine) +(?:.+)", action.lower()):
-        return "examine " + action.lower().split(" ", 1)[1].strip()
-    elif action.lower() in ("z", "wait"):
-        return "wait"
-    elif action.lower() in ("i", "inventory", "inv"):
-        return "inventory"
-    if re.match(r"l(?:ook)(?: .*)?", action.lower()):
-        return (
-            "look " + action.lower().split(" ", 1)[1].strip()
-            if len(action.lower().split(" ")) > 1
-            else "look"
-        )
-    else:
-        return action.lower()
+FIRST_OUTPUT = REGISTRY.histogram(
+    "xyzzy_first_output_seconds",
+    "Time from writing a command to the game to reading the first of its output.",
+)
+
+# How often the vote tally is updated during a democracy round.
+TALLY_INTERVAL = 5
+
+# How long to wait for the game to answer a command before writing the next one anyway.
+TURN_TIMEOUT = 5
+
+# Reactions letting players know what happened to input that wasn't queued.
+INPUT_REACTIONS = {
+    MERGED: "\N{CLOCKWISE RIGHTWARDS AND LEFTWARDS OPEN CIRCLE ARROWS}",
+    DROPPED: "\N{NO ENTRY SIGN}",
+}
 
 
 class InputMode(Enum):
@@ -60,10 +43,14 @@ class InputMode(Enum):
 class GameChannel:
     """Represents a channel that is prepped for playing a game through Xyzzy."""
 
-    def __init__(self, msg, game):
+    def __init__(self, msg, game, xyzzy):
+        self.xyzzy = xyzzy
         self.loop = asyncio.get_event_loop()
         self.indent = 0
         self.output = False
+        self.screen = False
+        self.screen_msg = None
+        self.screen_text = ""
         self.last = msg.created_at
         self.owner = msg.author
         self.channel = msg.channel
@@ -74,50 +61,115 @@ class GameChannel:
         self.last_save = None
         self.save = None
         self.mode = InputMode.ANARCHY
-        self.votes = {}
+        self.votes = VoteEngine(xyzzy.democracy_ties)
+        self.tally_msg = None
+        self.round_end = None
         self.timer = None
         self.voting = True
-
-    async def _democracy_loop(self):
+        self.turn_end = asyncio.Event()
+        self.hibernating = False
+        self.hibernated = False
+        # Set when the game wouldn't save, so it isn't tried again until someone plays.
+        self.hibernate_failed = False
+        self.waking = None
+        self.wake_event = asyncio.Event()
+        self.outputs = OutputQueue(xyzzy.output_queue_size, xyzzy.output_overflow)
+        self.inputs = InputQueue(xyzzy.input_queue_size)
+        self.writing = False
+        # Held while writing a batch or saving to hibernate, so the two never talk to
+        # the game at once.
+        self.write_lock = asyncio.Lock()
+        # Whether the game's last output ended at its usual ">" prompt, rather than
+        # asking for a filename or the like.
+        self.at_prompt = True
+        # The turn written to the game that hasn't had its output yet.
+        self.turn = None
+        self.turns = TurnLog()
+        self.transcript = None
+        self.transcript_turns = []
+        self.collapsing = {}
+
+    async def _democracy_tick(self):
+        """Updates the vote tally, and picks the winning command once the round is over."""
         try:
-            await asyncio.sleep(10)
-            await self.channel.send("```py\n@ 5 seconds of voting remaining. @\n```")
-            await asyncio.sleep(5)
+            remaining = self.round_end - self.loop.time()
+
+            # Votes are shown in one message that gets edited, instead of a message per
+            # vote.
+            await self._update_tally(remaining)
+
+            if remaining > 0:
+                if self.playing:
+                    self.timer = self.xyzzy.scheduler.call_later(
+                        min(TALLY_INTERVAL, remaining), self._democracy_tick
+                    )
+
+                return
 
             self.voting = False
-            vote_sort = sorted(
-                self.votes.items(), key=lambda x: len(x[1]), reverse=True
-            )
-            highest = sorted(x for x in vote_sort if len(x[1]) == len(vote_sort[0][1]))
+            tied = self.votes.tied()
+            cmd = self.votes.winner()
 
-            # Discard draws
-            if len(highest) > 1:
-                highest = [x[0] for x in highest]
-                draw_join = '"{}" and "{}"'.format(", ".join(highest[:-1]), highest[-1])
+            if cmd is None:
+                draw_join = '"{}" and "{}"'.format('", "'.join(tied[:-1]), tied[-1])
 
-                await self.channel.send(
+                await self.xyzzy.outbox.send(
+                    self.channel,
                     "```py\n@ VOTING DRAW @\nDraw between {}\nDitching all current votes and starting fresh.```".format(
                         draw_join
-                    )
+                    ),
+                    priority=Priority.VOTE,
                 )
             else:
-                cmd = highest[0][0]
-                amt = len(highest[0][1])
-
-                await self.channel.send(
+                await self.xyzzy.outbox.send(
+                    self.channel,
                     '```py\n@ VOTING RESULTS @\nRunning command "{}" with {} vote(s).\n```'.format(
-                        cmd, amt
-                    )
+                        cmd, self.votes.counts[cmd]
+                    ),
+                    priority=Priority.VOTE,
                 )
-                self._send_input(cmd)
+                await self.send_input(cmd)
 
-            self.votes = {}
+            self.votes.reset()
             self.voting = True
             self.timer = None
         except Exception as e:
             print(e)
             raise e
 
+    async def _update_tally(self, remaining):
+        """Sends or edits the tally message for the current round."""
+        lines = [
+            '{} vote(s) for "{}"'.format(votes, choice)
+            for choice, votes in self.votes.tally()
+        ]
+
+        if len(self.votes.counts) > len(lines):
+            lines.append(
+                "...and {} other command(s)".format(len(self.votes.counts) - len(lines))
+            )
+
+        if remaining > 0:
+            lines.append("@ {} seconds of voting remaining. @".format(ceil(remaining)))
+        else:
+            lines.append("@ Voting has ended. @")
+
+        content = "```py\n@ VOTES ({} voter(s)) @\n{}\n```".format(
+            len(self.votes), "\n".join(lines)
+        )
+
+        if self.tally_msg is None:
+            self.tally_msg = await self.xyzzy.outbox.send(
+                self.channel, content, priority=Priority.VOTE, mergeable=False
+            )
+        elif content != self.tally_msg.content:
+            self.tally_msg = await self.xyzzy.outbox.edit(
+                self.tally_msg, content=content, priority=Priority.VOTE
+            )
+
+        if remaining <= 0:
+            self.tally_msg = None
+
     def _send_input(self, input):
         """Send's text input to the game process."""
         if not self.process:
@@ -130,28 +182,122 @@ class GameChannel:
 
         self.process.stdin.write((input + "\n").encode("latin-1", "replace"))
 
-    async def parse_output(self, buffer):
-        if buffer != b"":
-            out = buffer.decode("latin-1", "replace")
-            msg = ""
+    def split_batch(self, input):
+        """Splits input like "n; n; e; take lamp" into the commands it is made of."""
+        # Line input, like a filename to save to, is sent as it is.
+        if not self.xyzzy.batch_separator or not self.at_prompt:
+            return [input]
+
+        commands = [x.strip() for x in input.split(self.xyzzy.batch_separator)]
+
+        return [x for x in commands if x] or [input]
+
+    async def send_input(self, input, msg=None):
+        """
+        Queues text input for the game, which may be a batch of several commands.
+        If `msg` is given, it gets a reaction when the input is merged or dropped because the queue is full.
+        """
+        received = self.loop.time()
+        commands = self.split_batch(input)
+        self.hibernate_failed = False
+
+        if len(commands) > self.xyzzy.batch_max:
+            if msg is not None:
+                await self.xyzzy.outbox.send(
+                    self.channel,
+                    "```diff\n-You can only send {} commands at once.\n```".format(
+                        self.xyzzy.batch_max
+                    ),
+                )
+
+            return DROPPED
 
-            for i, line in enumerate(out.splitlines()):
-                if line.strip() == ".":
-                    line = ""
+        status = self.inputs.put(commands, received)
 
-                line = line.replace("*", "\*").replace("_", "\_").replace("~", "\~")
+        if msg is None or status not in INPUT_REACTIONS:
+            return status
 
-                if len(msg + line[self.indent :] + "\n") < 2000:
-                    msg += line[self.indent :] + "\n"
-                else:
+        if self.channel.permissions_for(self.channel.guild.me).add_reactions:
+            try:
+                await msg.add_reaction(INPUT_REACTIONS[status])
+            except discord.HTTPException:
+                pass
+
+        return status
+
+    async def _input_writer(self):
+        """Writes queued input to the game, one turn at a time."""
+        while True:
+            item = await self.inputs.get()
+
+            if item is None:
+                return
+
+            commands, received = item
+            self.writing = True
+
+            try:
+                async with self.write_lock:
+                    await self._write_batch(commands, received)
+            except Exception as e:
+                print("Unable to send input to #{}: {}".format(self.channel.name, e))
+            finally:
+                self._end_batch()
+                self.turn = None
+                self.writing = False
+
+    async def _write_batch(self, commands, received):
+        if self.hibernated:
+            await self.wake()
+
+        # Output for a batch is collected, and sent as one transcript at the end.
+        if len(commands) > 1:
+            self.transcript = []
+
+        for command in commands:
+            if not self.process or self.process.returncode is not None:
+                break
+
+            if self.transcript is not None:
+                self._add_to_transcript(command)
+
+            self.turn_end.clear()
+            self.turn = Turn(command, received)
+            self._send_input(command)
+            self.turn.written = self.loop.time()
+            await self.process.stdin.drain()
+
+            # Hold the next command until the game has answered this one.
+            await self._wait_for_turn(TURN_TIMEOUT)
+
+    def _add_to_transcript(self, command):
+        # Put the command after the game's prompt, like it would be in a terminal.
+        if self.transcript and self.transcript[-1].endswith(">"):
+            self.transcript[-1] += " " + command
+        else:
+            self.transcript.append("> " + command)
+
+    def _end_batch(self):
+        """Queues the output collected for the current batch, if any."""
+        if self.transcript:
+            self.outputs.put("\n".join(self.transcript), self.transcript_turns)
+
+        self.transcript = None
+        self.transcript_turns = []
+
+    async def parse_output(self, out):
+        if out != "":
+            msg = None
+
+            for part in render_output(out, self.indent):
+                if msg:
                     await self.send_game_output(msg)
 
-                    msg = line[self.indent :]
+                msg = part
 
-            if not msg.strip():
+            if not msg:
                 return
 
-            msg = msg.strip()
             saves = self.check_saves()
 
             if self.first_time:
@@ -168,26 +314,60 @@ class GameChannel:
         self.first_time = True
         self.playing = True
 
+        await self.xyzzy.saves.watch(self.save_path)
+
+        sender = self.loop.create_task(self._output_sender())
+        writer = self.loop.create_task(self._input_writer())
+
         async def looper(buffer):
-            await self.parse_output(buffer)
+            turn = None
+
+            if buffer:
+                self.at_prompt = buffer.rstrip().endswith(b">")
+                self.turn_end.set()
+                turn, self.turn = self.turn, None
 
-            if os.path.exists(self.save_path):
-                files = os.listdir(self.save_path)
-                latest = 0
+                if turn is not None:
+                    turn.turn_end = self.loop.time()
 
-                for file in os.listdir(self.save_path):
-                    mod_time = os.stat("{}/{}".format(self.save_path, file)).st_mtime_ns
+            # Output from saving or restoring a hibernated game isn't shown.
+            if buffer and not self.hibernating:
+                out = buffer.decode("latin-1", "replace")
+                turns = [turn] if turn is not None else []
+
+                if self.transcript is not None:
+                    self.transcript.append(out)
+                    self.transcript_turns.extend(turns)
+                else:
+                    self.outputs.put(out, turns)
+
+        def on_read(chunk):
+            if self.turn is not None and self.turn.first_output is None:
+                self.turn.first_output = self.loop.time()
+                FIRST_OUTPUT.observe(self.turn.first_output - self.turn.written)
+
+        while True:
+            await handle_process_output(
+                self.process, looper, looper, self.xyzzy.output_timeout, on_read
+            )
 
-                    if (
-                        mod_time < latest
-                        or SCRIPT_OR_RECORD.match(file)
-                        or file == "__UPLOADED__.qzl"
-                    ):
-                        os.unlink("{}/{}".format(self.save_path, file))
-                    elif mod_time > latest and not SCRIPT_OR_RECORD.match(file):
-                        latest = mod_time
+            if not self.hibernated:
+                break
 
-        await handle_process_output(self.process, looper, self.parse_output)
+            # Sleep until someone sends input, or the game is quit.
+            await self.wake_event.wait()
+            self.wake_event.clear()
+
+            if not self.playing:
+                break
+
+        # Input can't go anywhere now, but let everything left in the output queue get
+        # sent first.
+        self.inputs.close()
+        writer.cancel()
+        self._end_batch()
+        self.outputs.close()
+        await sender
 
         self.playing = False
         end_msg = "```diff\n-The game has ended.\n"
@@ -202,56 +382,233 @@ class GameChannel:
 
         end_msg += "```"
 
-        await self.channel.send(end_msg, **end_kwargs)
+        await self.xyzzy.outbox.send(
+            self.channel, end_msg, priority=Priority.GAME, **end_kwargs
+        )
 
         self.cleanup()
 
+    async def _output_sender(self):
+        """Sends output queued by the reader, until the queue is closed."""
+        while True:
+            item = await self.outputs.get()
+
+            if item is None:
+                return
+
+            start = self.loop.time()
+
+            try:
+                await self.xyzzy.saves.refresh(self.save_path)
+
+                if item.dump:
+                    await self.send_output_dump(item.text)
+                else:
+                    await self.parse_output(item.text)
+
+                self.xyzzy.saves.prune(self.save_path)
+                self._finish_turns(item.turns)
+            except Exception as e:
+                print("Unable to send output to #{}: {}".format(self.channel.name, e))
+            finally:
+                self.outputs.blocked += self.loop.time() - start
+
+    def _finish_turns(self, turns):
+        """Logs turns whose output has been sent, for this channel and its game."""
+        now = self.loop.time()
+        game_log = self.xyzzy.turn_logs.setdefault(self.game.name, TurnLog())
+
+        for turn in turns:
+            turn.sent = now
+            self.turns.add(turn)
+            game_log.add(turn)
+
+    async def send_output_dump(self, out):
+        """Sends output that the channel couldn't keep up with as a file."""
+        if not self.channel.permissions_for(self.channel.guild.me).attach_files:
+            return await self.parse_output(out)
+
+        await self.xyzzy.outbox.send(
+            self.channel,
+            "```diff\n!The game got ahead of Discord, so here is what it said as a file.\n```",
+            file=discord.File(BytesIO(out.encode("utf-8")), "output.txt"),
+            priority=Priority.GAME,
+        )
+
     async def force_quit(self):
         """Forces the channel's game process to end."""
         if self.process is not None:
             self.process.terminate()
 
         self.playing = False
+        self.wake_event.set()
 
         if self.timer:
-            self.timer.cancel_task()
+            self.timer.cancel()
+
+    async def _wait_for_turn(self, timeout):
+        """Waits for the game to finish its current turn."""
+        try:
+            await asyncio.wait_for(self.turn_end.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.turn_end.clear()
+
+    async def hibernate(self, timeout=10):
+        """
+        Saves the game and stops its process, keeping only what is needed to bring it back.
+        The game will be restored from the save the next time someone sends input.
+        Only tried while the game is waiting at its usual prompt, as "save" typed into a menu or question could do anything.
+        """
+        if (
+            not self.process
+            or not self.at_prompt
+            or self.hibernate_failed
+            or self.hibernated
+            or self.timer
+            or self.waking
+            or self.writing
+            or self.inputs
+        ):
+            return False
+
+        async with self.write_lock:
+            return await self._hibernate(timeout)
+
+    async def _hibernate(self, timeout):
+        save = "{}/{}".format(self.save_path, HIBERNATE_SAVE)
+
+        if os.path.exists(save):
+            os.unlink(save)
+
+        self.hibernating = True
+        self.at_prompt = False
+        self.turn_end.clear()
+        self.process.stdin.write("save\n{}\n".format(HIBERNATE_SAVE).encode("latin-1"))
+        await self.process.stdin.drain()
+
+        # The save might not be done after the first bit of output if the game asks for
+        # a filename slowly.
+        deadline = self.loop.time() + timeout
+
+        while not os.path.isfile(save) and self.loop.time() < deadline:
+            await self._wait_for_turn(deadline - self.loop.time())
+
+        if not os.path.isfile(save) or self.process.returncode is not None:
+            # Game wouldn't save, so leave it running.
+            self.hibernating = False
+            self.hibernate_failed = True
+            return False
+
+        if self.writing or self.inputs:
+            # Someone sent input while the game was saving, which has to go to this
+            # process.
+            # Keep what's left of the save's output hidden until the game is back at its
+            # prompt.
+            while not self.at_prompt and self.loop.time() < deadline:
+                await self._wait_for_turn(deadline - self.loop.time())
+
+            self.hibernating = False
+            return False
+
+        self.hibernated = True
+        self.process.terminate()
+        await self.process.wait()
+        self.process = None
+
+        return True
+
+    async def wake(self):
+        """Restores a hibernated game from its save."""
+        if not self.waking:
+            self.waking = self.loop.create_task(self._wake())
+
+        try:
+            await asyncio.shield(self.waking)
+        finally:
+            self.waking = None
+
+    async def _wake(self):
+        self.turn_end.clear()
+        self.process = await spawn_interpreter(
+            self.game.path,
+            self.save_path,
+            "{}/{}".format(self.save_path, HIBERNATE_SAVE),
+        )
+        self.hibernated = False
+        self.wake_event.set()
+
+        # Let the game restore before sending it anything.
+        await self._wait_for_turn(10)
+        self.hibernating = False
+
+    async def collapse_input(self, msg, input):
+        """
+        Sends input to the game, unless the same action was sent by someone else in the last `collapse_window` seconds.
+        Everyone who sent the action gets credited in one line once the window closes.
+        Players repeating their own action (like "wait" or "n" in a maze) always get it sent.
+        """
+        action = self.game.actions.parse(input)
+        senders = self.collapsing.get(action)
+
+        if senders is not None:
+            if any(x.id == msg.author.id for x in senders):
+                return await self.send_input(input, msg)
+
+            senders.append(msg.author)
+            return
+
+        self.collapsing[action] = [msg.author]
+        self.xyzzy.scheduler.call_later(
+            self.xyzzy.collapse_window, self._credit_collapsed, action
+        )
+
+        await self.send_input(input, msg)
+
+    async def _credit_collapsed(self, action):
+        senders = self.collapsing.pop(action, [])
+
+        if len(senders) > 1:
+            await self.xyzzy.outbox.send(
+                self.channel,
+                "`{}` was sent for {}".format(
+                    action,
+                    ", ".join(
+                        discord.utils.escape_markdown(x.display_name) for x in senders
+                    ),
+                ),
+                priority=Priority.VOTE,
+            )
 
     async def handle_input(self, msg, input):
         """Easily handles the various input types for the game."""
 
         if self.mode == InputMode.ANARCHY:
             # Default mode, anyone can send any command at any time.
-            self._send_input(input)
+            if self.xyzzy.collapse_window:
+                await self.collapse_input(msg, input)
+            else:
+                await self.send_input(input, msg)
         elif self.mode == InputMode.DEMOCRACY:
-            # Players vote on commands. After 15 seconds of input, the top command is picked.
-            # On ties, all commands are scrapped and we start again.
+            # Players vote on commands. After `democracy_round` seconds of input, the
+            # top command is picked.
+            # Ties are handled according to `democracy_ties`.
             if not self.voting:
                 return
 
-            voters = []
-            [voters.extend(x) for x in self.votes.values()]
-
-            if msg.author.id in voters:
+            if not self.votes.vote(msg.author.id, self.game.actions.parse(input)):
                 return
 
-            action = parse_action(input)
-
-            if action in self.votes:
-                self.votes[action] += [msg.author.id]
-            else:
-                self.votes[action] = [msg.author.id]
-
-            await self.channel.send(
-                "{} has voted for `{}`".format(msg.author.mention, action)
-            )
-
             if not self.timer:
-                self.timer = self.loop.create_task(self._democracy_loop())
+                self.round_end = self.loop.time() + self.xyzzy.democracy_round
+                self.timer = self.xyzzy.scheduler.call_later(0, self._democracy_tick)
 
         elif self.mode == InputMode.DRIVER:
             # Only the "driver" can send input. They can pass the "wheel" to other people.
             if msg.author.id == self.owner.id:
-                self._send_input(input)
+                await self.send_input(input, msg)
         else:
             raise ValueError("Currently in unknown input state: {}".format(self.mode))
 
@@ -260,45 +617,52 @@ class GameChannel:
         if self.process:
             raise Exception("Game already has a process.")
 
+        if self.save:
+            self.xyzzy.pool.record(self.game)
+        else:
+            self.process = self.xyzzy.pool.acquire(self.game, self.save_path)
+
+            if self.process:
+                return
+
         # Make directory for saving
         if not os.path.exists(self.save_path):
             os.makedirs(self.save_path)
 
-        if self.save:
-            self.process = await asyncio.create_subprocess_shell(
-                "dfrotz -h 80 -w 5000 -m -R {} -L {} '{}'".format(
-                    self.save_path, self.save, self.game.path
-                ),
-                stdout=PIPE,
-                stdin=PIPE,
-            )
-        else:
-            self.process = await asyncio.create_subprocess_shell(
-                "dfrotz -h 80 -w 5000 -m -R {} '{}'".format(
-                    self.save_path, self.game.path
-                ),
-                stdout=PIPE,
-                stdin=PIPE,
-            )
+        self.process = await spawn_interpreter(
+            self.game.path, self.save_path, self.save
+        )
 
     async def send_game_output(self, msg, save=None):
         """Sends the game output to the game's channel, handling permissions."""
         if self.output:
             print(msg)
 
-        can_attach = self.channel.permissions_for(self.channel.guild.me).attach_files
-        opts = {}
+        perms = self.channel.permissions_for(self.channel.guild.me)
 
-        if self.channel.permissions_for(self.channel.guild.me).embed_links:
-            opts["embed"] = discord.Embed(
-                description=msg, colour=self.channel.guild.me.top_role.colour
-            )
-        else:
-            opts["content"] = ">>> {}".format(msg)
+        # In screen mode, add to the last message for as long as it fits.
+        if self.screen and self.screen_msg and not save:
+            text = "{}\n{}".format(self.screen_text, msg)
+
+            if len(text) <= (EMBED_LIMIT if perms.embed_links else MESSAGE_LIMIT):
+                try:
+                    edited = await self.xyzzy.outbox.edit(
+                        self.screen_msg,
+                        priority=Priority.GAME,
+                        **self._output_opts(text, perms)
+                    )
+                except discord.HTTPException:
+                    # Most likely the message was deleted, so start a new one.
+                    self.screen_msg = None
+                else:
+                    self.screen_text = text
+                    return edited
 
-        if save and can_attach:
+        opts = self._output_opts(msg, perms)
+
+        if save and perms.attach_files:
             opts["file"] = save
-        elif save and not can_attach:
+        elif save and not perms.attach_files:
             if "content" in opts:
                 opts["content"] += (
                     "\nI was unable to attach the save game due to not having permission to attach files.\n"
@@ -311,34 +675,44 @@ class GameChannel:
                     "If you wish to have saves available, pleease give me the `Attach Files` permission.",
                 )
 
-        await self.channel.send(**opts)
+        # Screen mode edits this message later, so it can't be shared with anything
+        # else.
+        sent = await self.xyzzy.outbox.send(
+            self.channel, priority=Priority.GAME, mergeable=not self.screen, **opts
+        )
+
+        if self.screen:
+            self.screen_msg = sent
+            self.screen_text = msg
+
+    def _output_opts(self, msg, perms):
+        if perms.embed_links:
+            return {
+                "embed": discord.Embed(
+                    description=msg, colour=self.channel.guild.me.top_role.colour
+                )
+            }
+
+        return {"content": ">>> {}".format(msg)}
 
     def check_saves(self):
         """Checks if the user saved the game."""
-        if os.path.exists(self.save_path):
-            files = [
-                x
-                for x in os.listdir(self.save_path)
-                if not SCRIPT_OR_RECORD.match(x) and x != "__UPLOADED__.qzl"
-            ]
-            latest = [0, None]
-
-            for file in files:
-                mod_time = os.stat("{}/{}".format(self.save_path, file)).st_mtime_ns
-
-                if mod_time > latest[0]:
-                    latest = [mod_time, file]
-
-            if latest[1] and latest[1] != self.last_save:
-                self.last_save = latest[1]
-                return discord.File(
-                    "{}/{}".format(self.save_path, latest[1]), latest[1]
-                )
-            return None
+        latest = self.xyzzy.saves.latest(self.save_path)
+
+        if latest and latest != self.last_save:
+            self.last_save = latest
+            return discord.File("{}/{}".format(self.save_path, latest), latest)
+
+        return None
 
     def cleanup(self):
         """Cleans up after the game."""
+        self.xyzzy.saves.unwatch(self.save_path)
 
+        # Saves for pooled processes live in the pool's directory.
+        if os.path.islink(self.save_path):
+            shutil.rmtree(os.path.realpath(self.save_path), ignore_errors=True)
+            os.unlink(self.save_path)
         # Check if cleanup has already been done.
-        if os.path.isdir(self.save_path):
+        elif os.path.isdir(self.save_path):
             shutil.rmtree(self.save_path)
@@ -0,0 +1,72 @@
+"""
+Bounded queue of input waiting to be written to a game.
+Each item is a batch of one or more commands, which are written one turn at a time, so a crowded channel can't pile up more input than the game has answered.
+"""
+
+from collections import deque
+
+import asyncio
+
+QUEUED = "queued"
+MERGED = "merged"
+DROPPED = "dropped"
+
+
+class InputQueue:
+    """
+    Holds up to `maxsize` batches of commands, which are written in the order they were sent.
+    Once it is full, a batch that is already waiting is merged with the one in the queue, and anything else is dropped.
+    """
+
+    def __init__(self, maxsize=4):
+        self.items = deque()
+        self.maxsize = maxsize
+        self.event = asyncio.Event()
+        self.closed = False
+        self.merged = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, commands, received=None):
+        """
+        Queues a batch of commands, returning whether it was queued, merged or dropped.
+        `received` is when the input arrived, which is handed back with the batch by `get`.
+        """
+        commands = tuple(commands)
+
+        if self.closed:
+            self.dropped += 1
+            return DROPPED
+
+        if len(self.items) >= self.maxsize:
+            key = tuple(x.lower() for x in commands)
+
+            if any(tuple(x.lower() for x in item) == key for item, _ in self.items):
+                self.merged += 1
+                return MERGED
+
+            self.dropped += 1
+            return DROPPED
+
+        self.items.append((commands, received))
+        self.event.set()
+
+        return QUEUED
+
+    async def get(self):
+        """Gets the next batch to write and when it was received, or None once the queue is closed."""
+        while not self.items:
+            if self.closed:
+                return None
+
+            self.event.clear()
+            await self.event.wait()
+
+        return self.items.popleft()
+
+    def close(self):
+        self.closed = True
+        self.items.clear()
+        self.event.set()
@@ -0,0 +1,210 @@
+"""
+Counters, gauges and histograms for keeping an eye on xyzzy, in Prometheus' text format.
+Metrics live in one registry. It can optionally be served over HTTP on localhost with aiohttp, which xyzzy already depends on.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import asyncio
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+
+    return "{{{}}}".format(
+        ",".join('{}="{}"'.format(k, _escape(v)) for k, v in labels.items())
+    )
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        # If set, called on every scrape to get the values instead.
+        self.function: Optional[Callable[[], Dict[Tuple, float]]] = None
+
+    def _key(self, labels) -> Tuple:
+        if set(labels) != set(self.labels):
+            raise ValueError(
+                "{} takes the labels {}, not {}".format(
+                    self.name, self.labels, tuple(labels)
+                )
+            )
+
+        return tuple(str(labels[x]) for x in self.labels)
+
+    def set_function(self, function: Callable[[], Dict[Tuple, float]]):
+        """Gets values from `function` when scraped, as a dict of label value tuples to values."""
+        self.function = function
+
+    def samples(self):
+        values = self.function() if self.function else self.values
+
+        for key, value in values.items():
+            yield self.name, dict(zip(self.labels, key)), value
+
+    def render(self) -> str:
+        lines = [
+            "# HELP {} {}".format(self.name, self.help),
+            "# TYPE {} {}".format(self.name, self.kind),
+        ]
+
+        for name, labels, value in self.samples():
+            lines.append("{}{} {}".format(name, _format_labels(labels), float(value)))
+
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+
+        if key not in self.values:
+            # Counts per bucket (plus +Inf), then the sum.
+            self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+
+        counts, _ = entry = self.values[key]
+        counts[bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self):
+        for key, (counts, total) in self.values.items():
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+
+                yield self.name + "_bucket", dict(labels, le=le), cumulative
+
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        existing = self.metrics.get(metric.name)
+
+        # Modules can be reloaded, so hand back what they registered the first time.
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labels != metric.labels:
+                raise ValueError("Metric {} is already registered.".format(metric.name))
+
+            return existing
+
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(x.render() for x in self.metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+LOOP_LAG = REGISTRY.histogram(
+    "xyzzy_loop_lag_seconds",
+    "How late the event loop ran a callback scheduled every second.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+
+class LagMonitor:
+    """Measures event loop lag by checking how late a once a second callback runs."""
+
+    def __init__(self, interval: float = 1):
+        self.interval = interval
+        self.handle = None
+        self.loop = None
+
+    def start(self):
+        self.loop = asyncio.get_event_loop()
+        self._schedule()
+
+    def _schedule(self):
+        self.expected = self.loop.time() + self.interval
+        self.handle = self.loop.call_at(self.expected, self._check)
+
+    def _check(self):
+        LOOP_LAG.observe(max(0, self.loop.time() - self.expected))
+        self._schedule()
+
+    def stop(self):
+        if self.handle:
+            self.handle.cancel()
+            self.handle = None
+
+
+async def serve(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY):
+    """Serves the registry at http://host:port/metrics, returning the runner to clean up with."""
+    from aiohttp import web
+
+    async def handler(request):
+        return web.Response(text=registry.render(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handler)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+
+    return runner
@@ -0,0 +1,317 @@
+"""
+Central queue for everything xyzzy sends to Discord.
+Messages are paced with token buckets matching Discord's per-channel and global limits, so bursts queue up here instead of running into 429s.
+Queued messages for the same channel get merged together where possible, and more important messages (like game output) go out first.
+"""
+
+from enum import IntEnum
+from heapq import heappop, heappush
+from itertools import count
+from modules.metrics import REGISTRY
+from time import monotonic
+
+import asyncio
+import logging
+
+CONTENT_LIMIT = 2000
+EMBED_LIMIT = 4096
+BLOCK_QUOTE = ">>> "
+
+SENT = REGISTRY.counter(
+    "xyzzy_discord_requests_total", "Messages sent and edited on Discord.", ["kind"]
+)
+RATELIMITED = REGISTRY.counter(
+    "xyzzy_discord_ratelimited_total",
+    "429s from Discord, which disnake waits out and retries.",
+)
+
+
+class RateLimitLog(logging.Handler):
+    """
+    Counts the 429s disnake gets. It retries them itself, and only raises once it runs out of retries.
+    The only other sign of them is its log message, so that is what gets counted.
+    """
+
+    def emit(self, record):
+        if record.getMessage().startswith("We are being rate limited"):
+            RATELIMITED.inc()
+
+
+def count_ratelimits():
+    """Starts counting disnake's 429s in `RATELIMITED`. Safe to call more than once."""
+    logger = logging.getLogger("disnake.http")
+
+    if not any(type(x).__name__ == "RateLimitLog" for x in logger.handlers):
+        logger.addHandler(RateLimitLog(logging.WARNING))
+
+
+class Priority(IntEnum):
+    GAME = 0
+    NORMAL = 1
+    VOTE = 2
+    ANNOUNCE = 3
+
+
+class TokenBucket:
+    """Allows `capacity` actions every `per` seconds, refilling gradually."""
+
+    def __init__(self, capacity, per):
+        self.capacity = capacity
+        self.rate = capacity / per
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """How long until a token is available."""
+        self._refill(now)
+
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class Outgoing:
+    """A queued send or edit, possibly standing in for several merged ones."""
+
+    def __init__(self, kind, target, priority, seq, kwargs, future, mergeable=True):
+        self.kind = kind
+        self.target = target
+        self.priority = priority
+        self.seq = seq
+        self.kwargs = kwargs
+        self.futures = [future]
+        # Sends whose caller edits the message afterwards can't share it with anyone.
+        self.mergeable = mergeable
+
+    def _mergeable(self):
+        embed = self.kwargs.get("embed")
+
+        return (
+            self.mergeable
+            and not self.kwargs.get("files")
+            and (
+                embed is None
+                or (not embed.fields and self.kwargs.get("content") is None)
+            )
+        )
+
+    def merge(self, other):
+        """Tries to fold a later message into this one, returning whether it worked."""
+        if self.kind != other.kind or self.target is not other.target:
+            return False
+
+        if self.kind == "edit":
+            # Only the latest edit to a message matters.
+            self.kwargs = other.kwargs
+            self.futures += other.futures
+            return True
+
+        if not self._mergeable() or not other._mergeable():
+            return False
+
+        if self.kwargs.get("file") and other.kwargs.get("file"):
+            return False
+
+        mine, theirs = self.kwargs.get("embed"), other.kwargs.get("embed")
+
+        if mine is not None and theirs is not None:
+            text = "{}\n{}".format(mine.description, theirs.description)
+
+            if mine.colour != theirs.colour or len(text) > EMBED_LIMIT:
+                return False
+
+            # The embed belongs to whoever sent it first, so don't change it under them.
+            mine = self.kwargs["embed"] = mine.copy()
+            mine.description = text
+        elif mine is None and theirs is None:
+            if (
+                self.kwargs.get("content") is None
+                or other.kwargs.get("content") is None
+            ):
+                return False
+
+            mine, theirs = self.kwargs["content"], other.kwargs["content"]
+
+            # A ">>> " block quote runs to the end of the message, so anything added
+            # after one ends up quoted too.
+            if mine.startswith(BLOCK_QUOTE):
+                if not theirs.startswith(BLOCK_QUOTE):
+                    return False
+
+                theirs = theirs[len(BLOCK_QUOTE) :]
+
+            content = "{}\n{}".format(mine, theirs)
+
+            if len(content) > CONTENT_LIMIT:
+                return False
+
+            self.kwargs["content"] = content
+        else:
+            return False
+
+        if other.kwargs.get("file"):
+            self.kwargs["file"] = other.kwargs["file"]
+
+        self.futures += other.futures
+        return True
+
+
+class Outbox:
+    """Sends messages and edits for the whole bot, respecting Discord's rate limits."""
+
+    def __init__(self, channel_rate=(5, 5.0), global_rate=(50, 1.0)):
+        self.channel_rate = channel_rate
+        self.global_bucket = TokenBucket(*global_rate)
+        self.buckets = {}
+        self.queues = {}
+        self.tails = {}
+        self.ready = []
+        self.waiting = []
+        self.delayed = set()
+        self.busy = set()
+        self.counter = count()
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.sent = 0
+        self.merged = 0
+        self.ratelimited = 0
+
+    def __len__(self):
+        return sum(len(x) for x in self.queues.values())
+
+    async def send(
+        self, dest, content=None, *, priority=Priority.NORMAL, mergeable=True, **kwargs
+    ):
+        """
+        Queues a message for `dest`, returning the message once it has been sent.
+        Messages can be merged into one, which every sender gets back, unless `mergeable` is False.
+        """
+        if content is not None:
+            kwargs["content"] = content
+
+        return await self._queue("send", dest.id, dest, priority, kwargs, mergeable)
+
+    async def edit(self, message, *, priority=Priority.NORMAL, **kwargs):
+        """Queues an edit to `message`. Edits are rate limited separately from sends."""
+        return await self._queue("edit", message.channel.id, message, priority, kwargs)
+
+    async def _queue(self, kind, key, target, priority, kwargs, mergeable=True):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self._run())
+
+        future = asyncio.get_event_loop().create_future()
+        item = Outgoing(
+            kind, target, priority, next(self.counter), kwargs, future, mergeable
+        )
+        tail = self.tails.get((kind, key, priority))
+
+        if tail and tail.merge(item):
+            self.merged += 1
+        else:
+            heappush(
+                self.queues.setdefault((kind, key), []), (priority, item.seq, item)
+            )
+            self.tails[(kind, key, priority)] = item
+            self._make_ready((kind, key))
+
+        return await future
+
+    def _make_ready(self, key):
+        queue = self.queues.get(key)
+
+        if queue and key not in self.busy and key not in self.delayed:
+            heappush(self.ready, (queue[0][0], queue[0][1], key))
+            self.wakeup.set()
+
+    def _bucket(self, key):
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(*self.channel_rate)
+
+        return self.buckets[key]
+
+    async def _run(self):
+        while True:
+            now = monotonic()
+
+            while self.waiting and self.waiting[0][0] <= now:
+                key = heappop(self.waiting)[1]
+                self.delayed.discard(key)
+                self._make_ready(key)
+
+            if not self.ready:
+                self.wakeup.clear()
+                timeout = self.waiting[0][0] - now if self.waiting else None
+
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+                continue
+
+            key = heappop(self.ready)[2]
+            queue = self.queues.get(key)
+
+            if not queue or key in self.busy or key in self.delayed:
+                continue
+
+            wait = self._bucket(key).delay(now)
+
+            if wait:
+                self.delayed.add(key)
+                heappush(self.waiting, (now + wait, key))
+                continue
+
+            wait = self.global_bucket.delay(now)
+
+            if wait:
+                self._make_ready(key)
+                await asyncio.sleep(wait)
+                continue
+
+            now = monotonic()
+            self._bucket(key).take(now)
+            self.global_bucket.take(now)
+
+            item = heappop(queue)[2]
+
+            if self.tails.get((key[0], key[1], item.priority)) is item:
+                del self.tails[(key[0], key[1], item.priority)]
+
+            if not queue:
+                del self.queues[key]
+
+            self.busy.add(key)
+            asyncio.get_event_loop().create_task(self._deliver(key, item))
+
+    async def _deliver(self, key, item):
+        try:
+            if item.kind == "edit":
+                result = await item.target.edit(**item.kwargs)
+            else:
+                result = await item.target.send(**item.kwargs)
+
+            self.sent += 1
+            SENT.inc(kind=item.kind)
+
+            for future in item.futures:
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            # Only once disnake has given up retrying, which RATELIMITED has already
+            # counted.
+            if getattr(e, "status", None) == 429:
+                self.ratelimited += 1
+
+            for future in item.futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.busy.discard(key)
+            self._make_ready(key)
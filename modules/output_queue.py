@@ -0,0 +1,76 @@
+"""
+Bounded queue between a game's output reader and the task sending that output to Discord.
+Putting never waits, so a slow Discord request can't stop the interpreter's output from being read.
+"""
+
+from collections import deque
+
+import asyncio
+
+OVERFLOW_POLICIES = ("merge", "attach")
+
+
+class OutputItem:
+    def __init__(self, text, dump=False, turns=()):
+        self.text = text
+        # Dumps are sent as a file, rather than as messages.
+        self.dump = dump
+        # Turns this is the output of, which are finished once it has been sent.
+        self.turns = list(turns)
+
+
+class OutputQueue:
+    """
+    Holds up to `maxsize` turns of output.
+    When full, new output is either merged into the last turn ("merge"), or everything queued is collapsed into one dump ("attach").
+    """
+
+    def __init__(self, maxsize=8, overflow="merge"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("Unknown overflow policy: {}".format(overflow))
+
+        self.items = deque()
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.event = asyncio.Event()
+        self.closed = False
+        self.high_water = 0
+        self.overflows = 0
+        # Seconds the sender has spent waiting on Discord.
+        self.blocked = 0.0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, text, turns=()):
+        if len(self.items) < self.maxsize:
+            self.items.append(OutputItem(text, turns=turns))
+        elif self.overflow == "attach":
+            self.overflows += 1
+            text = "\n".join([x.text for x in self.items] + [text])
+            turns = [t for x in self.items for t in x.turns] + list(turns)
+
+            self.items.clear()
+            self.items.append(OutputItem(text, True, turns))
+        else:
+            self.overflows += 1
+            self.items[-1].text += "\n" + text
+            self.items[-1].turns.extend(turns)
+
+        self.high_water = max(self.high_water, len(self.items))
+        self.event.set()
+
+    async def get(self):
+        """Gets the next item to send, or None once the queue is closed and empty."""
+        while not self.items:
+            if self.closed:
+                return None
+
+            self.event.clear()
+            await self.event.wait()
+
+        return self.items.popleft()
+
+    def close(self):
+        self.closed = True
+        self.event.set()
@@ -0,0 +1,75 @@
+"""
+Index of who is blocked from using xyzzy, and which games are blocked, per server.
+IDs are kept as ints in sets, so checking them is O(1) however many users a server has blocked.
+"""
+
+from modules.store import GLOBAL, Store
+from typing import Dict, Set
+
+
+class PolicyIndex:
+    """
+    In-memory copy of the blocks kept in `store`, which every check is served from.
+    Changes are made here first, then written through to the store in the background.
+    """
+
+    def __init__(self, store: Store):
+        self.store = store
+        self.users: Dict[int, Set[int]]
+        self.games: Dict[int, Set[str]]
+        self.users, self.games = store.load()
+        self.global_users: Set[int] = self.users.pop(GLOBAL, set())
+
+    def is_blocked(self, guild_id: int, user_id: int) -> bool:
+        """Checks if a user is blocked in a server, or everywhere."""
+        return user_id in self.global_users or user_id in self.users.get(guild_id, ())
+
+    def block_user(self, guild_id: int, user_id: int) -> bool:
+        """Blocks a user in a server, returning False if they already were."""
+        users = self.users.setdefault(guild_id, set())
+
+        if user_id in users:
+            return False
+
+        users.add(user_id)
+        self.store.block_user(guild_id, user_id)
+        return True
+
+    def unblock_user(self, guild_id: int, user_id: int) -> bool:
+        """Unblocks a user in a server, returning False if they weren't blocked."""
+        users = self.users.get(guild_id)
+
+        if not users or user_id not in users:
+            return False
+
+        users.discard(user_id)
+        self.store.block_user(guild_id, user_id, False)
+        return True
+
+    def blocked_games(self, guild_id: int) -> Set[str]:
+        return self.games.get(guild_id, set())
+
+    def is_game_blocked(self, guild_id: int, name: str) -> bool:
+        return name in self.games.get(guild_id, ())
+
+    def block_game(self, guild_id: int, name: str) -> bool:
+        """Blocks a game in a server, returning False if it already was."""
+        games = self.games.setdefault(guild_id, set())
+
+        if name in games:
+            return False
+
+        games.add(name)
+        self.store.block_game(guild_id, name)
+        return True
+
+    def unblock_game(self, guild_id: int, name: str) -> bool:
+        """Unblocks a game in a server, returning False if it wasn't blocked."""
+        games = self.games.get(guild_id)
+
+        if not games or name not in games:
+            return False
+
+        games.discard(name)
+        self.store.block_game(guild_id, name, False)
+        return True
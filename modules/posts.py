@@ -1,5 +1,4 @@
 import json
-import asyncio
 
 
 async def post_carbon(xyzzy):
@@ -62,11 +61,6 @@ async def post_all(xyzzy):
     await post_gist(xyzzy)
 
 
-def task_loop(xyzzy):
-    # 10/10 would make dumb function names again
-    async def loopy_doodle():
-        while True:
-            await post_all(xyzzy)
-            await asyncio.sleep(3600)
-
-    return xyzzy.loop.create_task(loopy_doodle())
+def schedule(xyzzy):
+    """Posts stats now, and every hour after that."""
+    return xyzzy.scheduler.call_every(3600, post_all, xyzzy, delay=0)
@@ -1,18 +1,82 @@
+from modules.metrics import REGISTRY
+from subprocess import PIPE
+
 import asyncio
 
+# Command games are run with. Anything taking dfrotz's arguments works, like the stub
+# interpreter in benchmarks/.
+INTERPRETER = "dfrotz"
+# How much to pull from the interpreter's stdout per read.
+READ_SIZE = 4096
+# Things dfrotz prints when it is waiting on the player.
+PROMPT_MARKERS = (b"\n>", b"[MORE]", b"***MORE***")
+
+STDOUT_BYTES = REGISTRY.counter(
+    "xyzzy_stdout_bytes_total", "Bytes read from interpreters' stdout."
+)
+SPAWN_TIME = REGISTRY.histogram(
+    "xyzzy_spawn_seconds", "How long it takes to start an interpreter."
+)
+
+
+def is_prompt(buffer: bytearray) -> bool:
+    """Checks if the buffer ends with one of the interpreter's input prompts."""
+    tail = bytes(buffer[-16:]).rstrip(b" ")
+
+    return tail == b">" or tail.endswith(PROMPT_MARKERS)
 
-async def handle_process_output(process, looper, after):
-    buffer = b""
+
+async def handle_process_output(process, looper, after, timeout=0.5, on_read=None):
+    """
+    Reads a process' output in chunks, calling `looper` with everything read once a turn ends.
+    A turn ends as soon as the interpreter prints a prompt, or when no output has been seen for `timeout` seconds.
+    `on_read` is called with each chunk as soon as it is read.
+    """
+    buffer = bytearray()
 
     while process.returncode is None:
         try:
-            output = await asyncio.wait_for(process.stdout.read(1), 0.5)
-            buffer += output
+            output = await asyncio.wait_for(process.stdout.read(READ_SIZE), timeout)
         except asyncio.TimeoutError:
-            await looper(buffer)
+            await looper(bytes(buffer))
+
+            buffer.clear()
+            continue
+
+        if not output:
+            # EOF, the process is on its way out.
+            break
+
+        STDOUT_BYTES.inc(len(output))
+
+        if on_read:
+            on_read(output)
+
+        buffer += output
+
+        if is_prompt(buffer):
+            await looper(bytes(buffer))
+
+            buffer.clear()
+
+    buffer += await process.stdout.read()
+
+    await process.wait()
+    await after(bytes(buffer))
+
+
+async def spawn_interpreter(game_path, save_path, save=None):
+    """Starts the interpreter (dfrotz, unless `INTERPRETER` has been changed) for a game without going through a shell."""
+    args = ["-h", "80", "-w", "5000", "-m", "-R", save_path]
+
+    if save:
+        args += ["-L", save]
 
-            buffer = b""
+    start = asyncio.get_event_loop().time()
+    process = await asyncio.create_subprocess_exec(
+        INTERPRETER, *args, game_path, stdout=PIPE, stdin=PIPE
+    )
 
-    last = await process.stdout.read()
+    SPAWN_TIME.observe(asyncio.get_event_loop().time() - start)
 
-    await after(last)
+    return process
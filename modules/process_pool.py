@@ -0,0 +1,154 @@
+"""
+Keeps idle dfrotz processes ready for the most played games, so `play` doesn't have to wait on one starting up.
+Pooled processes save into their own directory under `./saves/__pool__/`, which gets linked to the channel's save directory once handed out.
+"""
+
+from collections import Counter, deque
+from modules.process_helpers import spawn_interpreter
+
+import asyncio
+import os
+import shutil
+import time
+
+POOL_PATH = "./saves/__pool__"
+
+
+class PooledProcess:
+    def __init__(self, process, save_path):
+        self.process = process
+        self.save_path = save_path
+
+
+class ProcessPool:
+    """Pre-spawns interpreters for popular games, sized by how often they have been played recently."""
+
+    def __init__(self, size=2, games=5, window=3600):
+        self.size = size
+        self.games = games
+        self.window = window
+        self.idle = {}
+        self.demand = deque()
+        self.hits = 0
+        self.misses = 0
+        self._spawned = 0
+        self._refill = None
+
+    def __len__(self):
+        return sum(len(x) for x in self.idle.values())
+
+    def record(self, game):
+        """Records that a game has been played, for sizing the pool."""
+        if self.size > 0 and not game.debug:
+            self.demand.append((time.monotonic(), game.path))
+
+    def targets(self):
+        """Works out how many idle processes each game should have."""
+        now = time.monotonic()
+
+        while self.demand and now - self.demand[0][0] > self.window:
+            self.demand.popleft()
+
+        top = Counter(path for _, path in self.demand).most_common(self.games)
+
+        if not top:
+            return {}
+
+        peak = top[0][1]
+
+        return {path: max(1, round(self.size * count / peak)) for path, count in top}
+
+    def acquire(self, game, save_path):
+        """
+        Hands out an idle process for a game, linking its save directory to `save_path`.
+        Returns None if there are no processes ready for the game.
+        """
+        if self.size <= 0 or game.debug:
+            return None
+
+        self.record(game)
+
+        idle = self.idle.get(game.path)
+        pooled = None
+
+        while idle:
+            candidate = idle.popleft()
+
+            if candidate.process.returncode is None:
+                pooled = candidate
+                break
+
+            shutil.rmtree(candidate.save_path, ignore_errors=True)
+
+        self.schedule_refill()
+
+        if not pooled:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        # Bring along anything uploaded before the game started.
+        if os.path.islink(save_path):
+            os.unlink(save_path)
+        elif os.path.isdir(save_path):
+            for file in os.listdir(save_path):
+                shutil.move(os.path.join(save_path, file), pooled.save_path)
+
+            shutil.rmtree(save_path)
+
+        os.symlink(os.path.abspath(pooled.save_path), save_path)
+
+        return pooled.process
+
+    def schedule_refill(self):
+        """Starts a refill in the background, unless one is already running."""
+        if self._refill is None or self._refill.done():
+            self._refill = asyncio.get_event_loop().create_task(self.refill())
+
+    async def refill(self):
+        """Tops up the pool for games in demand, and trims it for the ones that no longer are."""
+        targets = self.targets()
+
+        for path, idle in list(self.idle.items()):
+            while len(idle) > targets.get(path, 0):
+                self._discard(idle.pop())
+
+            if not idle:
+                del self.idle[path]
+
+        for path, amount in targets.items():
+            idle = self.idle.setdefault(path, deque())
+
+            while len(idle) < amount and os.path.isfile(path):
+                try:
+                    idle.append(await self._spawn(path))
+                except Exception as e:
+                    print(
+                        'Unable to warm up "{}" for the process pool: {}'.format(
+                            path, e
+                        )
+                    )
+                    break
+
+    async def _spawn(self, path):
+        self._spawned += 1
+        save_path = "{}/{}".format(POOL_PATH, self._spawned)
+
+        os.makedirs(save_path, exist_ok=True)
+
+        return PooledProcess(await spawn_interpreter(path, save_path), save_path)
+
+    def _discard(self, pooled):
+        if pooled.process.returncode is None:
+            pooled.process.kill()
+
+        shutil.rmtree(pooled.save_path, ignore_errors=True)
+
+    def close(self):
+        """Kills every idle process."""
+        for idle in self.idle.values():
+            for pooled in idle:
+                self._discard(pooled)
+
+        self.idle = {}
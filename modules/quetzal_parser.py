@@ -11,6 +11,8 @@ from chunk import Chunk
 
 import os
 
+ZCODE_HEADER_SIZE = 64
+
 
 class HeaderData:
     def __init__(self, release, serial, checksum):
@@ -27,7 +29,29 @@ class HeaderData:
         return self.__str__()
 
 
-def read_word(address: int, mem: List[int]) -> int:
+class HeaderIndex:
+    """Maps z-code headers to the names of games, so saves can be matched without reading every game."""
+
+    def __init__(self):
+        self.headers = {}
+
+    def add(self, name: str, header: HeaderData) -> None:
+        self.headers.setdefault((header.release, header.serial), []).append(
+            (header.checksum, name)
+        )
+
+    def match(self, quetzal: HeaderData) -> List[str]:
+        """Gets the names of all games that a Quetzal header could belong to."""
+        return [
+            name
+            for checksum, name in self.headers.get(
+                (quetzal.release, quetzal.serial), []
+            )
+            if checksum == 0 or checksum == quetzal.checksum
+        ]
+
+
+def read_word(address: int, mem: Union[bytes, List[int]]) -> int:
     """Read's a 16-bit value at the specified address."""
     return (mem[address] << 8) + mem[address + 1]
 
@@ -95,14 +119,18 @@ def parse_zcode(path: str) -> HeaderData:
     if not os.path.isfile(path):
         raise Exception("File provided isn't a file, or doesn't exist.")
 
-    with open(path, encoding="latin_1") as zcode:
-        mem = zcode.read()
-        mem = [ord(x) for x in mem]
+    # Everything needed is in the 64 byte header, so don't bother with the rest of the
+    # file.
+    with open(path, "rb") as zcode:
+        mem = zcode.read(ZCODE_HEADER_SIZE)
+
+    if len(mem) < ZCODE_HEADER_SIZE:
+        raise Exception("File is too small to be a z-code game.")
 
-        # Byte magic
-        release = read_word(2, mem)
-        serial = int("".join(chr(x) for x in mem[0x12:0x18]))
-        checksum = read_word(0x1C, mem)
+    # Byte magic
+    release = read_word(2, mem)
+    serial = int(mem[0x12:0x18].decode("latin_1"))
+    checksum = read_word(0x1C, mem)
 
     return HeaderData(release, serial, checksum)
 
@@ -0,0 +1,71 @@
+"""
+Turns raw game output into Discord messages.
+Output is escaped in one go and packed into messages in a single pass over its lines, instead of rebuilding each message for every line.
+"""
+
+from typing import Iterator
+
+# Discord's limit, minus room for the ">>> " quote used when embeds aren't allowed.
+MESSAGE_LIMIT = 1996
+
+
+def escape(text: str) -> str:
+    """Escapes markdown in game output."""
+    # Chained replaces over the whole output beat str.translate, which is slow with
+    # multi-character replacements.
+    return text.replace("*", "\\*").replace("_", "\\_").replace("~", "\\~")
+
+
+def split_line(line: str, limit: int) -> Iterator[str]:
+    """Splits a line that is too long for one message, preferring to break between words."""
+    while len(line) > limit:
+        cut = line.rfind(" ", 0, limit + 1)
+
+        if cut <= 0:
+            cut = limit
+
+            # Don't separate an escape from what it's escaping.
+            if line[cut - 1] == "\\":
+                cut -= 1
+
+        yield line[:cut]
+        line = line[cut:].lstrip(" ")
+
+    yield line
+
+
+def render_output(
+    text: str, indent: int = 0, limit: int = MESSAGE_LIMIT
+) -> Iterator[str]:
+    """
+    Escapes game output, and packs it into as few messages as possible.
+    `indent` characters are removed from the start of each line.
+    """
+    if indent:
+        text = "\n".join(x[indent:] for x in text.splitlines())
+
+    parts = []
+    size = -1
+
+    for line in escape(text).splitlines():
+        # dfrotz uses a lone "." for blank lines.
+        if line.strip() == ".":
+            line = ""
+
+        for piece in split_line(line, limit) if len(line) > limit else (line,):
+            if parts and size + len(piece) + 1 > limit:
+                msg = "\n".join(parts).strip()
+
+                if msg:
+                    yield msg
+
+                parts = []
+                size = -1
+
+            parts.append(piece)
+            size += len(piece) + 1
+
+    msg = "\n".join(parts).strip()
+
+    if msg:
+        yield msg
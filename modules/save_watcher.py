@@ -0,0 +1,216 @@
+"""
+Keeps track of what games have saved in each channel's save directory, so it doesn't have to be scanned every turn.
+Uses inotify on Linux, and falls back to scanning the directories in a worker thread everywhere else.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import re
+import struct
+
+SCRIPT_OR_RECORD = re.compile(r"(?i).*(?:\.rec|\.scr)$")
+# Files that shouldn't be handed back to players.
+STRAY_SAVES = ("__UPLOADED__.qzl",)
+# Save made when a game is hibernated, which is left alone until it is woken.
+HIBERNATE_SAVE = "__HIBERNATE__.qzl"
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_IGNORED = 0x00008000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT = struct.Struct("iIII")
+
+
+def _load_inotify():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+
+    return libc
+
+
+class SaveIndex:
+    """The newest save in a directory, as well as anything that should be cleaned out of it."""
+
+    def __init__(self):
+        self.latest = None
+        self.strays = set()
+        self.wd = None
+
+    def written(self, name):
+        if name == HIBERNATE_SAVE:
+            return
+        elif SCRIPT_OR_RECORD.match(name) or name in STRAY_SAVES:
+            self.strays.add(name)
+        elif name != self.latest:
+            # Only the most recent save is kept around.
+            if self.latest:
+                self.strays.add(self.latest)
+
+            self.latest = name
+            self.strays.discard(name)
+
+    def removed(self, name):
+        self.strays.discard(name)
+
+        if self.latest == name:
+            self.latest = None
+
+
+def scan(path):
+    """Builds an index for a directory by looking at everything in it."""
+    index = SaveIndex()
+    files = []
+
+    try:
+        for entry in os.scandir(path):
+            files.append((entry.stat().st_mtime_ns, entry.name))
+    except FileNotFoundError:
+        return index
+
+    for _, name in sorted(files):
+        index.written(name)
+
+    return index
+
+
+def _unlink_all(path, names):
+    for name in names:
+        try:
+            os.unlink("{}/{}".format(path, name))
+        except FileNotFoundError:
+            pass
+
+
+class SaveWatcher:
+    """Watches save directories and keeps an index of each one."""
+
+    def __init__(self):
+        self.indexes = {}
+        self.watches = {}
+        # Directories that inotify couldn't watch, which are scanned instead.
+        self.polled = set()
+        self.libc = _load_inotify()
+        self.fd = None
+
+    @property
+    def polling(self):
+        return self.libc is None
+
+    def _start(self):
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+
+        if self.fd < 0:
+            print(
+                "Unable to start inotify ({}), falling back to polling saves.".format(
+                    os.strerror(ctypes.get_errno())
+                )
+            )
+            self.libc = None
+            return
+
+        asyncio.get_event_loop().add_reader(self.fd, self._read_events)
+
+    def _read_events(self):
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+
+        offset = 0
+
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            name = data[offset + EVENT.size : offset + EVENT.size + length]
+            name = name.rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += EVENT.size + length
+            path = self.watches.get(wd)
+
+            if path is None:
+                continue
+
+            if mask & IN_IGNORED:
+                # Directory was deleted or unwatched.
+                del self.watches[wd]
+                continue
+
+            index = self.indexes[path]
+
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                index.written(name)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                index.removed(name)
+
+    async def watch(self, path):
+        """Starts watching a save directory, indexing what is already in it."""
+        if path in self.indexes:
+            return
+
+        if self.libc and self.fd is None:
+            self._start()
+
+        self.indexes[path] = SaveIndex()
+
+        if self.libc:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+
+            if wd >= 0:
+                self.watches[wd] = path
+                self.indexes[path].wd = wd
+            else:
+                # Usually from running into fs.inotify.max_user_watches.
+                print(
+                    "Unable to watch {} ({}), polling it for saves instead.".format(
+                        path, os.strerror(ctypes.get_errno())
+                    )
+                )
+                self.polled.add(path)
+
+        index = await asyncio.get_event_loop().run_in_executor(None, scan, path)
+
+        if path in self.indexes:
+            # The scan started after the watch did, so it already covers anything that
+            # happened in between.
+            index.wd = self.indexes[path].wd
+            self.indexes[path] = index
+
+    def unwatch(self, path):
+        """Stops watching a save directory."""
+        index = self.indexes.pop(path, None)
+        self.polled.discard(path)
+
+        if index and index.wd is not None and index.wd in self.watches:
+            del self.watches[index.wd]
+            self.libc.inotify_rm_watch(self.fd, index.wd)
+
+    async def refresh(self, path):
+        """Brings the index for a directory up to date. Only does anything for directories that are polled."""
+        if (self.polling or path in self.polled) and path in self.indexes:
+            index = await asyncio.get_event_loop().run_in_executor(None, scan, path)
+
+            if path in self.indexes:
+                self.indexes[path] = index
+
+    def latest(self, path):
+        """Gets the name of the newest save in a directory."""
+        index = self.indexes.get(path)
+
+        return index.latest if index else None
+
+    def prune(self, path):
+        """Deletes any old saves, scripts or recordings in a directory, in a worker thread."""
+        index = self.indexes.get(path)
+
+        if not index or not index.strays:
+            return
+
+        names = list(index.strays)
+        index.strays.clear()
+
+        asyncio.get_event_loop().run_in_executor(None, _unlink_all, path, names)
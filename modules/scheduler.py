@@ -0,0 +1,173 @@
+"""
+One hashed timer wheel for everything xyzzy does later or every so often, instead of a sleeping task per job.
+Timers are dropped into slots by their deadline, so adding and cancelling them is O(1), and the event loop only has one callback waiting at a time no matter how many channels have timers running.
+"""
+
+from math import ceil
+
+import asyncio
+
+
+class Timer:
+    """A callback waiting on the wheel. Repeating timers have an `interval`."""
+
+    def __init__(self, scheduler, callback, args, interval=None):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.deadline = None
+        self.task = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Stops the timer from firing again. Doesn't stop a callback that is already running."""
+        if not self.cancelled:
+            self.cancelled = True
+            self.scheduler._remove(self)
+
+
+class Scheduler:
+    """
+    Timer wheel with `slots` slots, each `tick` seconds long.
+    Timers further away than one turn of the wheel stay in their slot until their turn comes round.
+    Callbacks may be coroutine functions, which are run as tasks. A repeating timer skips a run if its last one hasn't finished.
+    """
+
+    def __init__(self, tick=0.25, slots=1024):
+        # Set up once the first timer is added, so the wheel can be made before the
+        # event loop is running.
+        self.loop = None
+        self.epoch = None
+        self.tick = tick
+        self.slots = slots
+        self.wheel = [set() for _ in range(slots)]
+        # The next tick that hasn't been run yet.
+        self.current = 0
+        self.pending = 0
+        self.handle = None
+        self.wake_tick = None
+        self.running = False
+        self.fired = 0
+
+    def __len__(self):
+        return self.pending
+
+    def call_later(self, delay, callback, *args):
+        """Calls `callback(*args)` after `delay` seconds."""
+        timer = Timer(self, callback, args)
+        self._add(timer, delay)
+
+        return timer
+
+    def call_every(self, interval, callback, *args, delay=None):
+        """Calls `callback(*args)` every `interval` seconds, the first time after `delay` (default `interval`)."""
+        timer = Timer(self, callback, args, interval)
+        self._add(timer, interval if delay is None else delay)
+
+        return timer
+
+    def close(self):
+        if self.handle:
+            self.handle.cancel()
+            self.handle = None
+
+        for slot in self.wheel:
+            for timer in slot:
+                timer.cancelled = True
+
+            slot.clear()
+
+        self.pending = 0
+
+    def _tick_at(self, when):
+        return int((when - self.epoch) / self.tick)
+
+    def _add(self, timer, delay):
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+            self.epoch = self.loop.time()
+
+        self._insert(timer, ceil((self.loop.time() + delay - self.epoch) / self.tick))
+
+    def _insert(self, timer, deadline):
+        timer.deadline = max(deadline, self.current)
+
+        self.wheel[timer.deadline % self.slots].add(timer)
+        self.pending += 1
+
+        # While the wheel is running, it works out when to wake up next once it's done.
+        if not self.running and (
+            self.handle is None or timer.deadline < self.wake_tick
+        ):
+            self._wake_at(timer.deadline)
+
+    def _remove(self, timer):
+        slot = self.wheel[timer.deadline % self.slots]
+
+        if timer in slot:
+            slot.discard(timer)
+            self.pending -= 1
+
+    def _wake_at(self, tick):
+        if self.handle:
+            self.handle.cancel()
+
+        self.wake_tick = tick
+        self.handle = self.loop.call_at(self.epoch + tick * self.tick, self._run)
+
+    def _run(self):
+        self.handle = None
+        self.running = True
+        now = self._tick_at(self.loop.time())
+
+        while self.current <= now:
+            tick = self.current
+            self.current += 1
+            slot = self.wheel[tick % self.slots]
+
+            if not slot:
+                continue
+
+            for timer in [x for x in slot if x.deadline <= tick]:
+                slot.discard(timer)
+                self.pending -= 1
+                self._fire(timer)
+
+        self.running = False
+
+        if self.pending:
+            # Sleep until the next slot with anything in it, which is at most one turn
+            # of the wheel away.
+            for i in range(self.slots):
+                if self.wheel[(self.current + i) % self.slots]:
+                    break
+
+            self._wake_at(self.current + i)
+
+    def _fire(self, timer):
+        if timer.interval is not None:
+            # Counted from the last deadline, so repeating timers don't drift.
+            self._insert(
+                timer, timer.deadline + max(1, round(timer.interval / self.tick))
+            )
+
+            if timer.task and not timer.task.done():
+                return
+
+        self.fired += 1
+
+        try:
+            result = timer.callback(*timer.args)
+        except Exception as e:
+            print("Error in scheduled {}: {}".format(timer.callback.__name__, e))
+            return
+
+        if asyncio.iscoroutine(result):
+            timer.task = self.loop.create_task(result)
+            timer.task.add_done_callback(self._done)
+
+    @staticmethod
+    def _done(task):
+        if not task.cancelled() and task.exception():
+            print("Error in scheduled task: {}".format(task.exception()))
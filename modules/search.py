@@ -0,0 +1,161 @@
+"""
+Looks up games by their names and aliases.
+Exact names are a dict lookup, prefixes go through a trie and anything else through a trigram index, which also handles typos.
+"""
+
+from collections import Counter
+from modules.game import Game
+from typing import Dict, List
+
+# Minimum similarity for a game to be suggested when nothing else matches.
+FUZZY_CUTOFF = 0.5
+FUZZY_LIMIT = 5
+
+
+def trigrams(text: str, pad: bool = False) -> set:
+    if pad:
+        text = "  {} ".format(text)
+
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance, so swapped letters only count once."""
+    prev2 = None
+    prev = list(range(len(b) + 1))
+
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+
+        prev2, prev = prev, cur
+
+    return prev[-1]
+
+
+class SearchResult:
+    """
+    The outcome of a search.
+    `game` is set when the search picked out a single game, otherwise `matches` holds the best candidates.
+    `fuzzy` is True if none of the candidates actually contained the query.
+    """
+
+    def __init__(self, game=None, matches=None, fuzzy=False):
+        self.game = game
+        self.matches = matches or []
+        self.fuzzy = fuzzy
+
+    def describe(self, query: str) -> str:
+        """Explains to the user why no single game was picked."""
+        if not self.matches:
+            return '```diff\n-I couldn\'t find any games matching "{}"\n```'.format(
+                query
+            )
+        elif self.fuzzy:
+            return (
+                "```accesslog\n"
+                'I couldn\'t find any games matching "{}". Did you mean one of these?\n'
+                '"{}"\n'
+                "```".format(query, '"\n"'.join(self.matches))
+            )
+
+        return (
+            "```accesslog\n"
+            'I couldn\'t find any games with that name, but I found "{}" in {} other games. Did you mean one of these?\n'
+            '"{}"\n'
+            "```".format(query, len(self.matches), '"\n"'.join(self.matches))
+        )
+
+
+class GameSearch:
+    """Index over the names and aliases of a set of games."""
+
+    def __init__(self, games: Dict[str, Game], aliases: Dict[str, List[str]]):
+        self.games = games
+        self.exact = aliases
+        self.trie = {}
+        self.substrings = {}
+        self.fuzzy = {}
+
+        for key, names in aliases.items():
+            node = self.trie
+
+            for char in key:
+                node = node.setdefault(char, {})
+                node.setdefault(None, set()).update(names)
+
+            for gram in trigrams(key):
+                self.substrings.setdefault(gram, set()).add(key)
+
+            for gram in trigrams(key, True):
+                self.fuzzy.setdefault(gram, set()).add(key)
+
+    def prefixed(self, query: str) -> set:
+        """Gets the names of all games with a name or alias starting with `query`."""
+        node = self.trie
+
+        for char in query:
+            node = node.get(char)
+
+            if node is None:
+                return set()
+
+        return node.get(None, set())
+
+    def containing(self, query: str) -> set:
+        """Gets the names of all games with a name or alias containing `query`."""
+        if len(query) < 3:
+            keys = (x for x in self.exact if query in x)
+        else:
+            postings = sorted(
+                (self.substrings.get(x, set()) for x in trigrams(query)), key=len
+            )
+            keys = (x for x in set.intersection(*postings) if query in x)
+
+        return {name for key in keys for name in self.exact[key]}
+
+    def similar(self, query: str) -> List[str]:
+        """Gets the names of the games that look the most like `query`, best first."""
+        grams = trigrams(query, True)
+        shared = Counter(key for x in grams for key in self.fuzzy.get(x, ()))
+        scores = {}
+
+        for key, count in shared.items():
+            score = 2 * count / (len(grams) + len(key) + 1)
+
+            if abs(len(key) - len(query)) <= 2:
+                score = max(
+                    score, 1 - edit_distance(query, key) / max(len(key), len(query))
+                )
+
+            for name in self.exact[key]:
+                if score >= FUZZY_CUTOFF and score > scores.get(name, 0):
+                    scores[name] = score
+
+        return sorted(scores, key=lambda x: (-scores[x], x))[:FUZZY_LIMIT]
+
+    def find(self, query: str) -> SearchResult:
+        """Searches for a game, preferring exact names, then prefixes, then any part of a name."""
+        query = query.lower().strip()
+
+        if not query:
+            return SearchResult()
+
+        if query in self.exact:
+            return SearchResult(self.games[self.exact[query][0]])
+
+        prefixed = self.prefixed(query)
+        matches = sorted(prefixed) + sorted(self.containing(query) - prefixed)
+
+        if len(matches) == 1:
+            return SearchResult(self.games[matches[0]])
+        elif matches:
+            return SearchResult(matches=matches)
+
+        return SearchResult(matches=self.similar(query), fuzzy=True)
@@ -0,0 +1,160 @@
+"""
+SQLite store for xyzzy's persistent state (blocked users and blocked games).
+The database runs in WAL mode and changes are written one row at a time on a single background thread, so a write never blocks the event loop and a crash can't leave a half-written file behind.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Set, Tuple
+
+import json
+import os
+import sqlite3
+
+DB_PATH = "./bot-data/xyzzy.db"
+# What the store replaces. They are read once, then left alone.
+USERS_PATH = "./bot-data/blocked_users.json"
+SETTINGS_PATH = "./bot-data/server_settings.json"
+
+# Stands in for the server ID of users blocked everywhere.
+GLOBAL = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS blocked_users (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS blocked_games (
+    guild_id INTEGER NOT NULL,
+    game TEXT NOT NULL,
+    PRIMARY KEY (guild_id, game)
+);
+"""
+
+
+class Store:
+    """
+    Reads happen all at once on startup, for PolicyIndex to serve from memory.
+    Writes are queued on the store's own thread, in the order they were made.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store")
+        # Only used from the executor's thread after this, but made here so startup can
+        # read from it.
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.writes = 0
+        self.failed = 0
+
+        self.migrate()
+
+    def migrate(self, users_path: str = USERS_PATH, settings_path: str = SETTINGS_PATH):
+        """
+        Copies the old JSON files into the database, the first time it is opened.
+        Blocked games were the only server setting ever used, so nothing else is kept from server_settings.json.
+        """
+        if self.db.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+
+        users = {}
+        settings = {}
+
+        if os.path.exists(users_path):
+            with open(users_path) as blk:
+                users = json.load(blk)
+
+        if os.path.exists(settings_path):
+            with open(settings_path) as srv:
+                settings = json.load(srv)
+
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO blocked_users VALUES (?, ?)",
+                (
+                    (GLOBAL if guild == "global" else int(guild), int(user))
+                    for guild, ids in users.items()
+                    for user in ids
+                ),
+            )
+
+            self.db.executemany(
+                "INSERT OR IGNORE INTO blocked_games VALUES (?, ?)",
+                (
+                    (int(guild), game)
+                    for guild, data in settings.items()
+                    for game in data.get("blocked_games", ())
+                ),
+            )
+
+            self.db.execute("INSERT INTO meta VALUES ('json_migrated', '1')")
+
+        if users or settings:
+            print(
+                "Moved blocked users and games into {}. The old JSON files are no longer used.".format(
+                    self.path
+                )
+            )
+
+    def load(self) -> Tuple[Dict[int, Set[int]], Dict[int, Set[str]]]:
+        """Gets the blocked users and games for every server, with global blocks under `GLOBAL`."""
+        users = {}
+        games = {}
+
+        for guild, user in self.db.execute(
+            "SELECT guild_id, user_id FROM blocked_users"
+        ):
+            users.setdefault(guild, set()).add(user)
+
+        for guild, game in self.db.execute("SELECT guild_id, game FROM blocked_games"):
+            games.setdefault(guild, set()).add(game)
+
+        return users, games
+
+    def block_user(self, guild_id: int, user_id: int, blocked: bool = True):
+        if blocked:
+            return self._write(
+                "INSERT OR IGNORE INTO blocked_users VALUES (?, ?)", (guild_id, user_id)
+            )
+
+        return self._write(
+            "DELETE FROM blocked_users WHERE guild_id = ? AND user_id = ?",
+            (guild_id, user_id),
+        )
+
+    def block_game(self, guild_id: int, game: str, blocked: bool = True):
+        if blocked:
+            return self._write(
+                "INSERT OR IGNORE INTO blocked_games VALUES (?, ?)", (guild_id, game)
+            )
+
+        return self._write(
+            "DELETE FROM blocked_games WHERE guild_id = ? AND game = ?",
+            (guild_id, game),
+        )
+
+    def _write(self, sql, params):
+        future = self.executor.submit(self._execute, sql, params)
+        future.add_done_callback(self._written)
+
+        return future
+
+    def _execute(self, sql, params):
+        with self.db:
+            self.db.execute(sql, params)
+
+    def _written(self, future):
+        if future.exception():
+            self.failed += 1
+            print("Unable to write to {}: {}".format(self.path, future.exception()))
+        else:
+            self.writes += 1
+
+    def close(self):
+        """Finishes any queued writes, and closes the database."""
+        self.executor.shutdown(wait=True)
+        self.db.close()
@@ -0,0 +1,113 @@
+"""
+Timings for each command a game is sent, from the player's message to the game's answer being sent back to Discord.
+Finished turns are kept in small ring buffers per channel and per game, so the slow part of a turn (queueing, the interpreter, reading its output or Discord) can be picked out afterwards.
+"""
+
+from collections import deque
+from itertools import count
+from typing import Dict, List, Optional
+
+# How many finished turns each log keeps.
+LOG_SIZE = 256
+
+# Each phase is the time between two of a turn's timestamps.
+PHASES = (
+    ("queued", "received", "written"),
+    ("game", "written", "first_output"),
+    ("reader", "first_output", "turn_end"),
+    ("discord", "turn_end", "sent"),
+    ("total", "received", "sent"),
+)
+
+PERCENTILES = (50, 90, 99)
+
+_ids = count(1)
+
+
+class Turn:
+    """
+    One command written to a game. Timestamps are in event loop time, and are None until that point of the turn is reached:
+    `received` when the input arrived, `written` once it was written to the game, `first_output` on the first read from the game afterwards, `turn_end` once its output was complete, and `sent` when that output finished sending.
+    """
+
+    __slots__ = (
+        "id",
+        "command",
+        "received",
+        "written",
+        "first_output",
+        "turn_end",
+        "sent",
+    )
+
+    def __init__(self, command: str, received: float):
+        self.id = next(_ids)
+        self.command = command
+        self.received = received
+        self.written = None
+        self.first_output = None
+        self.turn_end = None
+        self.sent = None
+
+    def phases(self) -> Dict[str, float]:
+        """Gets how long each phase of the turn took, leaving out any that weren't reached."""
+        out = {}
+
+        for name, start, end in PHASES:
+            start = getattr(self, start)
+            end = getattr(self, end)
+
+            if start is not None and end is not None:
+                out[name] = max(0, end - start)
+
+        return out
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted `values`."""
+    rank = int(-(-len(values) * pct // 100))
+
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+class TurnLog:
+    """Ring buffer of the last `size` finished turns."""
+
+    def __init__(self, size: int = LOG_SIZE):
+        self.turns = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self.turns)
+
+    def add(self, turn: Turn):
+        self.turns.append(turn)
+
+    def summary(self) -> Dict[str, Optional[tuple]]:
+        """Gets the percentiles in `PERCENTILES` for each phase, or None for phases with no turns."""
+        times = {name: [] for name, _, _ in PHASES}
+
+        for turn in self.turns:
+            for name, value in turn.phases().items():
+                times[name].append(value)
+
+        out = {}
+
+        for name, values in times.items():
+            values.sort()
+            out[name] = (
+                tuple(percentile(values, x) for x in PERCENTILES) if values else None
+            )
+
+        return out
+
+    def format(self) -> str:
+        """Formats the summary as one line, in milliseconds."""
+        parts = []
+
+        for name, pcts in self.summary().items():
+            if pcts is not None:
+                parts.append(
+                    "{} {}".format(name, "/".join(str(round(x * 1000)) for x in pcts))
+                )
+
+        return " | ".join(parts)
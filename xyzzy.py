@@ -12,11 +12,21 @@ if not shutil.which("dfrotz"):
         'dfrotz not detected to be in PATH. If you do not have frotz in dumb mode, refer to "https://github.com/DavidGriffith/frotz/blob/master/INSTALL#L78", and then move the dfrotz executable to somewhere that is in PATH, for example /usr/bin.'
     )
 
-from modules.command_sys import Context, Holder
-from modules.game import Game
+from modules.command_sys import ArgumentParseError, Context, Holder
+from modules.catalog import load_catalog
+from modules.democracy import TIE_POLICIES
+from modules.outbound import Outbox, count_ratelimits
+from modules.output_queue import OVERFLOW_POLICIES
+from modules.policy import PolicyIndex
+from modules.process_pool import ProcessPool
+from modules.save_watcher import SaveWatcher
+from modules.scheduler import Scheduler
+from modules.store import Store
 from datetime import datetime
 from glob import glob
 from random import randint
+from functools import partial
+from collections import Counter
 from configparser import ConfigParser
 
 import os
@@ -27,6 +37,7 @@ import traceback
 import typing
 import aiohttp
 import disnake as discord
+import modules.metrics as metrics
 import modules.posts as posts
 
 OPTIONAL_CONFIG_OPTIONS = (
@@ -36,6 +47,20 @@ OPTIONAL_CONFIG_OPTIONS = (
     "dbots_key",
     "gist_key",
     "gist_id",
+    "output_timeout",
+    "pool_size",
+    "pool_games",
+    "hibernate_after",
+    "watch_games",
+    "output_queue_size",
+    "output_overflow",
+    "input_queue_size",
+    "batch_separator",
+    "batch_max",
+    "collapse_window",
+    "democracy_round",
+    "democracy_ties",
+    "metrics_port",
 )
 REQUIRED_CONFIG_OPTIONS = {
     "token": '"token" option required in configuration.\nThis is needed to connect to Discord and actually run.\nMake sure there is a line that is something like "token = hTtPSwWwyOutUBECOMW_AtcH-vdQW4W9WgXc_q".',
@@ -59,7 +84,9 @@ class ConsoleColours:
 
 class Xyzzy(discord.Client):
     home_channel: discord.TextChannel
-    prefix: re.Pattern
+    # Set once connected, as they need the bot's ID.
+    prefix: typing.Optional[re.Pattern] = None
+    mentions: typing.Tuple[str, ...] = ()
 
     def __init__(self):
         print(ConsoleColours.HEADER + "Welcome to Xyzzy, v2.0." + ConsoleColours.END)
@@ -94,68 +121,89 @@ class Xyzzy(discord.Client):
         if self.home_channel_id:
             self.home_channel_id = int(self.home_channel_id)
 
+        self.output_timeout = float(self.output_timeout) if self.output_timeout else 0.5
+        self.pool_size = int(self.pool_size) if self.pool_size is not None else 2
+        self.pool_games = int(self.pool_games) if self.pool_games is not None else 5
+        self.hibernate_after = (
+            float(self.hibernate_after) if self.hibernate_after else 0
+        )
+        self.watch_games = (self.watch_games or "").lower() in (
+            "yes",
+            "true",
+            "on",
+            "1",
+        )
+        self.output_queue_size = (
+            int(self.output_queue_size) if self.output_queue_size else 8
+        )
+        self.output_overflow = (self.output_overflow or "merge").lower()
+        self.input_queue_size = (
+            int(self.input_queue_size) if self.input_queue_size else 4
+        )
+        self.batch_separator = (self.batch_separator or "").strip()
+        self.batch_max = int(self.batch_max) if self.batch_max else 8
+        self.collapse_window = (
+            float(self.collapse_window) if self.collapse_window else 0
+        )
+        self.democracy_round = (
+            float(self.democracy_round) if self.democracy_round else 15
+        )
+        self.democracy_ties = (self.democracy_ties or "discard").lower()
+        self.metrics_port = int(self.metrics_port) if self.metrics_port else None
+
+        if self.democracy_ties not in TIE_POLICIES:
+            raise Exception(
+                '"democracy_ties" must be one of: {}'.format(", ".join(TIE_POLICIES))
+            )
+
+        if self.output_overflow not in OVERFLOW_POLICIES:
+            raise Exception(
+                '"output_overflow" must be one of: {}'.format(
+                    ", ".join(OVERFLOW_POLICIES)
+                )
+            )
+
         self.owner_ids = (
             [] if not self.owner_ids else [x.strip() for x in self.owner_ids.split(",")]
         )
         self.gist_data_cache = None
         self.gist_game_cache = None
 
-        print("Reading game database...")
-
-        with open("./games.json") as games:
-            games = json.load(games)
-            self.games = {}
-
-            for name, data in games.items():
-                if not os.path.exists(data["path"]):
-                    print("Path for {} is invalid. Delisting.".format(name))
-                else:
-                    self.games[name] = Game(name, data)
-
         if not os.path.exists("./bot-data/"):
             print('Creating bot data directory at "./bot-data/"')
             os.makedirs("./bot-data/")
 
+        print("Reading game database...")
+
+        self.catalog = load_catalog()
+        self.games_mtime = os.stat("./games.json").st_mtime_ns
+
         if not os.path.exists("./save-cache/"):
             print('Creating save cache directory at "./save-cache/"')
             os.makedirs("./save-cache/")
 
-        try:
-            print("Loading blocked user list...")
-
-            with open("./bot-data/blocked_users.json") as blk:
-                self.blocked_users = json.load(blk)
-        except FileNotFoundError:
-            print(
-                ConsoleColours.WARNING
-                + "Blocked user list not found. Creating new blocked user list..."
-                + ConsoleColours.END
-            )
-
-            with open("./bot-data/blocked_users.json", "w") as blk:
-                blk.write("{}")
-                self.blocked_users = {}
-
-        try:
-            print("Loading server settings...")
-
-            with open("./bot-data/server_settings.json") as srv:
-                self.server_settings = json.load(srv)
-        except FileNotFoundError:
-            print(
-                ConsoleColours.WARNING
-                + "Server settings not found. Creating new server settings file.."
-                + ConsoleColours.END
-            )
+        print("Loading blocked users and games...")
 
-            with open("./bot-data/server_settings.json", "w") as srv:
-                srv.write("{}")
-                self.server_settings = {}
+        self.store = Store()
+        self.policy = PolicyIndex(self.store)
 
         self.process = None
         self.thread = None
         self.queue = None
         self.channels = {}
+        self.pool = ProcessPool(self.pool_size, self.pool_games)
+        self.saves = SaveWatcher()
+        self.outbox = Outbox()
+        # Why messages were ignored by on_message, and how many weren't.
+        self.ingress_stats = Counter()
+        # Recent turns for each game, by name. Channels keep their own.
+        self.turn_logs = {}
+        self.scheduler = Scheduler()
+        self.lag_monitor = metrics.LagMonitor()
+        self.metrics_runner = None
+
+        self.register_metrics()
+        count_ratelimits()
 
         self.session = aiohttp.ClientSession()
         self.commands = Holder(self)
@@ -164,7 +212,10 @@ class Xyzzy(discord.Client):
             print("Cleaning out saves directory after reboot.")
 
             for s in os.listdir("./saves"):
-                shutil.rmtree("./saves/" + s)
+                if os.path.islink("./saves/" + s):
+                    os.unlink("./saves/" + s)
+                else:
+                    shutil.rmtree("./saves/" + s)
 
         print(
             ConsoleColours.OK_GREEN
@@ -174,6 +225,108 @@ class Xyzzy(discord.Client):
 
         super().__init__()
 
+    @property
+    def games(self):
+        return self.catalog.games
+
+    async def reload_games(self):
+        """
+        Reloads games.json, only checking the games that have changed.
+        Running games keep using what they were started with.
+        """
+        self.catalog = await self.loop.run_in_executor(
+            None, partial(load_catalog, previous=self.catalog)
+        )
+        self.games_mtime = os.stat("./games.json").st_mtime_ns
+
+        return self.catalog
+
+    async def check_games(self):
+        """Reloads games.json if it has changed since it was last loaded."""
+        try:
+            if os.stat("./games.json").st_mtime_ns != self.games_mtime:
+                print("games.json has changed, reloading...")
+                await self.reload_games()
+        except Exception as e:
+            print(
+                ConsoleColours.FAIL
+                + "Unable to reload games.json: {}".format(e)
+                + ConsoleColours.END
+            )
+            self.games_mtime = os.stat("./games.json").st_mtime_ns
+
+    def register_metrics(self):
+        """Adds metrics that are worked out from the bot's state whenever they are scraped."""
+        metrics.REGISTRY.gauge(
+            "xyzzy_channels",
+            "Channels playing a game, by game and mode.",
+            ["game", "mode"],
+        ).set_function(
+            lambda: Counter(
+                (x.game.name, x.mode.name.lower())
+                for x in self.channels.values()
+                if x.playing
+            )
+        )
+        metrics.REGISTRY.gauge(
+            "xyzzy_hibernated_channels", "Channels with a hibernated game."
+        ).set_function(
+            lambda: {(): sum(1 for x in self.channels.values() if x.hibernated)}
+        )
+        metrics.REGISTRY.gauge(
+            "xyzzy_pool_idle", "Interpreters waiting in the process pool."
+        ).set_function(lambda: {(): len(self.pool)})
+        metrics.REGISTRY.counter(
+            "xyzzy_pool_requests_total",
+            "Games started from the pool, or not.",
+            ["result"],
+        ).set_function(lambda: {("hit",): self.pool.hits, ("miss",): self.pool.misses})
+        metrics.REGISTRY.counter(
+            "xyzzy_ingress_messages_total",
+            "Messages seen by on_message, by whether they were accepted or why they were dropped.",
+            ["result"],
+        ).set_function(lambda: {(k,): v for k, v in self.ingress_stats.items()})
+        metrics.REGISTRY.gauge(
+            "xyzzy_outbox_queued", "Sends and edits waiting to go to Discord."
+        ).set_function(lambda: {(): len(self.outbox)})
+
+    async def close(self):
+        self.lag_monitor.stop()
+
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+
+        self.scheduler.close()
+        self.pool.close()
+        self.store.close()
+        await super().close()
+
+    async def hibernate_idle(self):
+        """Hibernates any games that nobody has sent input to for a while."""
+        if not self.hibernate_after:
+            return
+
+        now = discord.utils.utcnow()
+
+        for chan in list(self.channels.values()):
+            if (
+                chan.process
+                and not chan.hibernated
+                and not chan.hibernate_failed
+                and (now - chan.last).total_seconds() > self.hibernate_after * 60
+            ):
+                try:
+                    if await chan.hibernate():
+                        print(
+                            "Hibernated {} in #{} (Server: {})".format(
+                                chan.game.name,
+                                chan.channel.name,
+                                chan.channel.guild.name,
+                            )
+                        )
+                except Exception as e:
+                    print("Unable to hibernate #{}: {}".format(chan.channel.name, e))
+
     def game_count(self):
         return sum(1 for i in self.channels.values() if i.game and not i.game.debug)
 
@@ -231,6 +384,7 @@ class Xyzzy(discord.Client):
         )
 
         self.prefix = re.compile(rf"^<@!?{self.user.id}>(.*)")
+        self.mentions = ("<@{}>".format(self.user.id), "<@!{}>".format(self.user.id))
         self.home_channel = typing.cast(
             discord.TextChannel, self.get_channel(self.home_channel_id)
         )
@@ -251,6 +405,27 @@ class Xyzzy(discord.Client):
 
         if not self.timestamp:
             self.timestamp = datetime.utcnow().timestamp()
+            self.hibernate_timer = self.scheduler.call_every(60, self.hibernate_idle)
+
+            if self.pool_size > 0:
+                # Follows demand as it comes and goes, not just when a game is started
+                # from the pool.
+                self.pool_timer = self.scheduler.call_every(
+                    60, self.pool.schedule_refill
+                )
+
+            self.lag_monitor.start()
+
+            if self.metrics_port:
+                self.metrics_runner = await metrics.serve(self.metrics_port)
+                print(
+                    "Serving metrics at http://127.0.0.1:{}/metrics".format(
+                        self.metrics_port
+                    )
+                )
+
+            if self.watch_games:
+                self.games_timer = self.scheduler.call_every(10, self.check_games)
 
             if self.gist_key and self.gist_id:
                 url = "https://api.github.com/gists/" + self.gist_id
@@ -290,7 +465,7 @@ class Xyzzy(discord.Client):
                     ) as r:
                         print("[{}]".format(r.status))
 
-            self.post_loop = await posts.task_loop(self)
+            self.post_timer = posts.schedule(self)
 
     async def on_guild_join(self, guild: discord.Guild):
         print('I have been added to "{}".'.format(guild.name))
@@ -308,55 +483,66 @@ class Xyzzy(discord.Client):
                 'I have been removed from "{0.name}" (ID: {0.id}).'.format(guild)
             )
 
-    async def on_message(self, msg: discord.Message):
-        # don't check message if no prefix
-        if 'prefix' not in dir(self): return
+    def ingress(self, msg: discord.Message):
+        """
+        Works out whether a message is meant for xyzzy, doing the cheapest checks first.
+        Returns the message content without the mention and whether it was a reply to xyzzy, or None if it should be ignored.
+        """
+        if self.prefix is None:
+            self.ingress_stats["not ready"] += 1
+            return None
+
+        if msg.author.bot or msg.author.id == self.user.id:
+            self.ingress_stats["bot"] += 1
+            return None
+
+        if msg.content.startswith(self.mentions):
+            clean = self.prefix.match(msg.content)[1].strip()
+            is_reply = False
+        else:
+            resolved = msg.reference and msg.reference.resolved
 
-        is_reply_to_me = (
-            msg.reference
-            and isinstance(msg.reference.resolved, discord.Message)
-            and msg.reference.resolved.author.id == self.user.id
-        )
+            if not (
+                isinstance(resolved, discord.Message)
+                and resolved.author.id == self.user.id
+            ):
+                self.ingress_stats["not for us"] += 1
+                return None
 
-        if (
-            msg.author.bot
-            or msg.author.id == self.user.id
-            or (
-                msg.guild
-                and not msg.channel.permissions_for(msg.guild.me).send_messages
-            )
-            or (not self.prefix.match(msg.content) and not is_reply_to_me)
-        ):
+            # Take plain message content if it's a reply to us.
+            clean = msg.content
+            is_reply = True
+
+        if msg.guild and not msg.channel.permissions_for(msg.guild.me).send_messages:
+            self.ingress_stats["no permission"] += 1
+            return None
+
+        # Without this, an error is thrown below due to only one character.
+        if not clean:
+            self.ingress_stats["empty"] += 1
+            return None
+
+        self.ingress_stats["accepted"] += 1
+
+        return clean, is_reply
+
+    async def on_message(self, msg: discord.Message):
+        found = self.ingress(msg)
+
+        if not found:
             return
 
-        if msg.guild and (
-            (
-                str(msg.guild.id) in self.blocked_users
-                and str(msg.author.id) in self.blocked_users[str(msg.guild.id)]
-            )
-            or (
-                "global" in self.blocked_users
-                and str(msg.author.id) in self.blocked_users["global"]
-            )
-        ):
+        clean, is_reply_to_me = found
+
+        if msg.guild and self.policy.is_blocked(msg.guild.id, msg.author.id):
             return await msg.author.send(
                 "```diff\n"
                 '!An administrator has disabled your ability to submit commands in "{}"\n'
                 "```".format(msg.guild.name)
             )
 
-        # Take plain message content if it's a reply to us, otherwise force prefix match
-        clean = (
-            msg.content
-            if is_reply_to_me
-            else typing.cast(re.Match, self.prefix.match(msg.content))[1].strip()
-        )
         is_game_cmd = clean.startswith(">")
 
-        # Without this, an error is thrown below due to only one character.
-        if len(clean) == 0:
-            return
-
         # Send game input if a game is running.
         if (
             is_game_cmd
@@ -374,16 +560,15 @@ class Xyzzy(discord.Client):
         if CAH_REGEX.match(clean):
             return await msg.channel.send("no")
 
-        if not self.commands.get_command(clean.split(" ")[0]):
-            return
+        ctx = Context(msg, self, clean, is_reply_to_me)
 
-        try:
-            ctx = Context(msg, self)
-        except ValueError:
-            return await msg.channel.send("Shlex error.")
+        if not self.commands.get_command(ctx.cmd):
+            return
 
         try:
             await self.commands.run(ctx)
+        except ArgumentParseError as e:
+            await ctx.send("```diff\n-{}\n```".format(e))
         except Exception as e:
             await self.handle_error(ctx, e)
 